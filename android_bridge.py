@@ -0,0 +1,102 @@
+"""Android 相关初始化：Java 类、运行时权限和中文字体均在首次使用时才加载"""
+import json
+import os
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+# 只在第一次使用时通过 jnius.autoclass 解析
+JAVA_CLASSES = {
+    'PythonActivity': 'org.kivy.android.PythonActivity',
+    'Intent': 'android.content.Intent',
+    'MediaStore': 'android.provider.MediaStore',
+    'Uri': 'android.net.Uri',
+    'File': 'java.io.File',
+    'BitmapFactory': 'android.graphics.BitmapFactory',
+    'FileOutputStream': 'java.io.FileOutputStream',
+}
+
+CHINESE_FONTS = [
+    '/system/fonts/NotoSansCJK-Regular.ttc',
+    '/system/fonts/NotoSansSC-Regular.otf',
+    '/system/fonts/DroidSansFallback.ttf',
+    '/system/fonts/NotoSansHans-Regular.otf',
+]
+
+_resolved_classes = {}
+
+
+def java_class(name):
+    """按短名获取 Java 类，首次调用时解析并缓存"""
+    cls = _resolved_classes.get(name)
+    if cls is None:
+        from jnius import autoclass
+        cls = autoclass(JAVA_CLASSES[name])
+        _resolved_classes[name] = cls
+        Logger.info(f"Android: Resolved Java class {name}")
+    return cls
+
+
+def ensure_permissions(on_result):
+    """确认相机权限后在主线程调用 on_result(granted)
+
+    已授权时直接回调；否则首次使用相机时才申请运行时权限。request_permissions 是异步的，
+    用户在系统对话框中选择之后才回调，调用方必须等回调再启动相机。
+    """
+    try:
+        from android.permissions import check_permission, request_permissions, Permission
+    except Exception as e:
+        # 无法检查时按原来的方式直接启动相机，由调用方处理启动失败
+        Logger.error(f"Android: Permission API unavailable: {e}")
+        on_result(True)
+        return
+    if check_permission(Permission.CAMERA):
+        on_result(True)
+        return
+
+    def on_permissions(permissions, grant_results):
+        # 在 Android UI 线程中调用，回到 Kivy 主线程再继续
+        granted = dict(zip(permissions, grant_results)).get(Permission.CAMERA, False)
+        Logger.info(f"Android: Camera permission {'granted' if granted else 'denied'}")
+        Clock.schedule_once(lambda dt: on_result(bool(granted)))
+
+    Logger.info("Android: Requesting camera permission")
+    request_permissions([
+        Permission.CAMERA,
+        Permission.WRITE_EXTERNAL_STORAGE,
+        Permission.READ_EXTERNAL_STORAGE
+    ], on_permissions)
+
+
+def register_chinese_font(cache_file):
+    """注册系统中文字体为默认字体 Roboto
+
+    找到的字体路径缓存在 cache_file 中，之后启动只需检查一个路径。
+    """
+    from kivy.core.text import LabelBase
+
+    cached = None
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f).get('font_path')
+    except (OSError, ValueError):
+        pass
+
+    candidates = [cached] if cached and os.path.exists(cached) else CHINESE_FONTS
+    for font_path in candidates:
+        if not os.path.exists(font_path):
+            continue
+        try:
+            LabelBase.register(name='Roboto', fn_regular=font_path)
+            Logger.info(f"App: Registered Chinese font: {font_path}")
+        except Exception as e:
+            Logger.warning(f"App: Failed to register font {font_path}: {e}")
+            continue
+        if font_path != cached:
+            try:
+                with open(cache_file, 'w', encoding='utf-8') as f:
+                    json.dump({'font_path': font_path}, f)
+            except OSError as e:
+                Logger.warning(f"App: Failed to cache font path: {e}")
+        return font_path
+    return None
@@ -0,0 +1,326 @@
+"""备份归档：记录与图片的流式导出 / 导入（用于备份和换机迁移）"""
+import io
+import json
+import os
+import shutil
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from kivy.logger import Logger
+
+from image_store import hash_file
+from records import as_dict, record_from_dict
+
+ARCHIVE_FORMAT = 'item-tracker-archive/1'
+MANIFEST_NAME = 'manifest.json'
+RECORDS_NAME = 'items.jsonl'
+COPY_CHUNK = 1024 * 1024
+# 进度回调的最小间隔（秒）
+PROGRESS_INTERVAL = 0.2
+
+
+class ArchiveCancelled(Exception):
+    """导出 / 导入被取消"""
+
+
+def archive_image_name(digest):
+    """图片在归档中的路径（与内容存储的目录结构相同）"""
+    return f'images/{digest[:2]}/{digest}.jpg'
+
+
+def recompress_image(path, max_dimension, quality):
+    """把图片缩放到 max_dimension 以内并重新编码为 JPEG，返回字节（在线程池中调用）"""
+    from PIL import Image as PILImage
+    with PILImage.open(path) as img:
+        img.draft('RGB', (max_dimension, max_dimension))
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.thumbnail((max_dimension, max_dimension))
+        buf = io.BytesIO()
+        img.save(buf, 'JPEG', quality=quality, optimize=True)
+    data = buf.getvalue()
+    # 重新编码后反而更大时保留原文件
+    if len(data) >= os.path.getsize(path):
+        return None
+    return data
+
+
+class _Task:
+    """导出 / 导入共用的取消标志与限频的进度回调
+
+    progress(stage, done, total) 在工作线程中调用，调用方自行转回主线程。
+    """
+    def __init__(self, progress=None):
+        self.progress = progress
+        self._cancelled = threading.Event()
+        self._reported_at = 0.0
+
+    def cancel(self):
+        """请求取消（任意线程），在处理下一条记录前生效"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _check_cancelled(self):
+        if self._cancelled.is_set():
+            raise ArchiveCancelled('cancelled')
+
+    def _report(self, stage, done, total, force=False):
+        if self.progress is None:
+            return
+        now = time.monotonic()
+        if force or now - self._reported_at >= PROGRESS_INTERVAL:
+            self._reported_at = now
+            self.progress(stage, done, total)
+
+
+class ArchiveExporter(_Task):
+    """把记录和图片写入一个 zip 归档
+
+    归档内容：images/ 下每张图片一份（按内容哈希去重），items.jsonl 每行一条记录
+    （image_path 为图片在归档中的路径），最后写入 manifest.json。
+    图片按 COPY_CHUNK 分块复制，记录逐行写入，内存占用与记录数和图片大小无关
+    （只保存 图片路径 -> 哈希 的映射）。JPEG 已经压缩过，图片不再 deflate。
+    max_dimension 不为空时图片先缩放并重新编码（用 workers 个线程并行，最多领先
+    写入 2 * workers 张），用于缩小迁移用的归档。
+    先写到 .tmp 文件，完成后替换，失败或取消时不留下半个归档。
+    export() 在工作线程中执行。
+    """
+    def __init__(self, progress=None, workers=2, max_dimension=None, quality=80):
+        super().__init__(progress)
+        self.workers = max(1, workers)
+        self.max_dimension = max_dimension
+        self.quality = quality
+
+    def export(self, path, items):
+        """导出记录快照 items，返回报告"""
+        started = time.perf_counter()
+        items = list(items)
+        tmp_path = path + '.tmp'
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        report = {
+            'records': len(items),
+            'images': 0,
+            'missing': 0,
+            'bytes_in': 0,
+            'bytes_out': 0
+        }
+        try:
+            with zipfile.ZipFile(tmp_path, 'w', allowZip64=True) as zf:
+                digests = self._write_images(zf, items, report)
+                self._write_records(zf, items, digests)
+                manifest = {
+                    'format': ARCHIVE_FORMAT,
+                    'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'records': len(items),
+                    'images': report['images']
+                }
+                zf.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2))
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        report['size'] = os.path.getsize(path)
+        report['elapsed_ms'] = (time.perf_counter() - started) * 1000.0
+        Logger.info(
+            f"Archive: Exported {report['records']} records, {report['images']} images "
+            f"({report['size'] / 1048576.0:.1f} MB, {report['missing']} missing) "
+            f"to {path} in {report['elapsed_ms']:.0f} ms"
+        )
+        return report
+
+    def _write_images(self, zf, items, report):
+        """写入全部图片，返回 {图片路径: 哈希}（图片缺失时为 None）"""
+        # 按路径去重，多条记录共享同一张图片时只处理一次
+        sources = {}
+        for item in items:
+            image_path = item.get('image_path')
+            if image_path and image_path not in sources:
+                sources[image_path] = item.get('image_hash')
+
+        digests = {}
+        written = set()
+        total = len(sources)
+        for done, (image_path, digest, data) in enumerate(self._prepared(sources.items()), 1):
+            self._check_cancelled()
+            digests[image_path] = digest
+            if digest is None:
+                report['missing'] += 1
+            elif digest not in written:
+                written.add(digest)
+                name = archive_image_name(digest)
+                if data is not None:
+                    zf.writestr(zipfile.ZipInfo(name), data, compress_type=zipfile.ZIP_STORED)
+                    report['bytes_out'] += len(data)
+                else:
+                    info = zipfile.ZipInfo(name)
+                    info.compress_type = zipfile.ZIP_STORED
+                    with open(image_path, 'rb') as src, zf.open(info, 'w') as dst:
+                        shutil.copyfileobj(src, dst, COPY_CHUNK)
+                    report['bytes_out'] += info.file_size
+                report['bytes_in'] += os.path.getsize(image_path)
+                report['images'] += 1
+            self._report('images', done, total)
+        self._report('images', total, total, force=True)
+        return digests
+
+    def _prepared(self, sources):
+        """按顺序产生 (图片路径, 哈希, 重新编码后的字节或 None)，重新编码时在线程池中并行"""
+        if self.max_dimension is None:
+            for image_path, digest in sources:
+                yield (image_path,) + self._prepare(image_path, digest)
+            return
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ArchivePool') as pool:
+            # 只领先有限张，已重新编码的图片不会在内存中堆积
+            window = deque()
+            try:
+                for image_path, digest in sources:
+                    window.append((image_path, pool.submit(self._prepare, image_path, digest)))
+                    if len(window) >= self.workers * 2:
+                        image_path, future = window.popleft()
+                        yield (image_path,) + future.result()
+                while window:
+                    image_path, future = window.popleft()
+                    yield (image_path,) + future.result()
+            finally:
+                for _, future in window:
+                    future.cancel()
+
+    def _prepare(self, image_path, digest):
+        """返回 (哈希, 重新编码后的字节或 None)，图片不存在时哈希为 None"""
+        if self.cancelled or not os.path.exists(image_path):
+            return None, None
+        if not digest:
+            digest = hash_file(image_path)
+        data = None
+        if self.max_dimension is not None:
+            try:
+                data = recompress_image(image_path, self.max_dimension, self.quality)
+            except Exception as e:
+                Logger.warning(f"Archive: Recompress failed, storing original {image_path}: {e}")
+        return digest, data
+
+    def _write_records(self, zf, items, digests):
+        """逐行写入记录"""
+        info = zipfile.ZipInfo(RECORDS_NAME)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        total = len(items)
+        with zf.open(info, 'w', force_zip64=True) as raw:
+            with io.TextIOWrapper(raw, encoding='utf-8', newline='\n') as f:
+                for done, item in enumerate(items, 1):
+                    if done % 1000 == 0:
+                        self._check_cancelled()
+                    data = dict(as_dict(item))
+                    image_path = data.pop('image_path', None)
+                    data.pop('image_hash', None)
+                    digest = digests.get(image_path)
+                    if digest:
+                        data['image_hash'] = digest
+                        data['image_path'] = archive_image_name(digest)
+                    f.write(json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+                    f.write('\n')
+                    self._report('records', done, total)
+        self._report('records', total, total, force=True)
+
+
+class ArchiveImporter(_Task):
+    """从 zip 归档逐条导入记录和图片
+
+    items.jsonl 逐行读取，图片逐张分块复制进内容存储（边复制边计算哈希，内容存储
+    中已有的图片只增加引用）。已存在的 id（is_known(id) 为真）和归档内重复的 id
+    跳过，因此中断后重新导入同一个归档会跳过已导入的记录，从中断处继续。
+    导入的记录每 batch_size 条交给 on_batch(records) 一次（工作线程中调用），
+    由调用方加入集合并持久化；图片总是先于记录入库。
+    run() 在工作线程中执行。
+    """
+    def __init__(self, content_store, on_batch, is_known=None, progress=None, batch_size=200):
+        super().__init__(progress)
+        self.content_store = content_store
+        self.on_batch = on_batch
+        self.is_known = is_known or (lambda item_id: False)
+        self.batch_size = batch_size
+
+    def run(self, path):
+        """导入归档 path，返回报告；格式无法识别时抛出 ValueError"""
+        started = time.perf_counter()
+        report = {
+            'imported': 0,
+            'skipped': 0,
+            'images': 0,
+            'shared_images': 0,
+            'missing': 0,
+            'errors': 0
+        }
+        with zipfile.ZipFile(path) as zf:
+            try:
+                manifest = json.loads(zf.read(MANIFEST_NAME))
+            except KeyError:
+                raise ValueError('not an item archive (manifest.json missing)')
+            if manifest.get('format') != ARCHIVE_FORMAT:
+                raise ValueError(f"unknown archive format {manifest.get('format')!r}")
+            total = manifest.get('records', 0)
+
+            seen = set()
+            batch = []
+            try:
+                with zf.open(RECORDS_NAME) as raw:
+                    lines = io.TextIOWrapper(raw, encoding='utf-8')
+                    for done, line in enumerate(lines, 1):
+                        self._check_cancelled()
+                        record = self._import_line(zf, line, seen, report)
+                        if record is not None:
+                            batch.append(record)
+                            if len(batch) >= self.batch_size:
+                                self.on_batch(batch)
+                                batch = []
+                        self._report('import', done, total)
+            finally:
+                # 取消或出错时已入库图片的记录也交出去，重新导入时跳过
+                if batch:
+                    self.on_batch(batch)
+            self._report('import', total, total, force=True)
+
+        report['elapsed_ms'] = (time.perf_counter() - started) * 1000.0
+        Logger.info(
+            f"Archive: Imported {report['imported']} records ({report['skipped']} already present, "
+            f"{report['images']} new images, {report['shared_images']} shared, "
+            f"{report['missing']} missing, {report['errors']} damaged) "
+            f"from {path} in {report['elapsed_ms']:.0f} ms"
+        )
+        return report
+
+    def _import_line(self, zf, line, seen, report):
+        """导入一行记录（先复制图片），跳过或损坏时返回 None"""
+        if not line.strip():
+            return None
+        try:
+            data = json.loads(line)
+            item_id = data.get('id')
+        except (ValueError, AttributeError):
+            report['errors'] += 1
+            return None
+        if not item_id or item_id in seen or self.is_known(item_id):
+            report['skipped'] += 1
+            return None
+        seen.add(item_id)
+
+        member = data.pop('image_path', None)
+        data.pop('image_hash', None)
+        if member:
+            try:
+                with zf.open(member) as src:
+                    digest, stored_path, duplicate = self.content_store.put_stream(src)
+            except KeyError:
+                report['missing'] += 1
+            else:
+                data['image_hash'] = digest
+                data['image_path'] = stored_path
+                report['shared_images' if duplicate else 'images'] += 1
+        report['imported'] += 1
+        return record_from_dict(data)
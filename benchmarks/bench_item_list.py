@@ -0,0 +1,217 @@
+"""物品列表基准测试：10k 条记录下的帧时间与内存占用
+
+用法:
+    python benchmarks/bench_item_list.py [--items 10000] [--mode recycle|grid] [--images 1]
+
+recycle 为当前 RecycleView 列表；grid 为旧的 GridLayout + 每条记录一个卡片的实现，
+仅用于对比。--images 指定不同图片的数量（循环分配给记录），用于观察纹理缓存下的内存上限。
+"""
+import argparse
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 命令行参数留给本脚本解析，不交给 Kivy
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from kivy.app import App
+from kivy.clock import Clock
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
+from kivy.uix.gridlayout import GridLayout
+from kivy.uix.image import Image
+from kivy.uix.label import Label
+from kivy.uix.scrollview import ScrollView
+
+from collection import ItemCollection
+from main import ItemTrackerApp
+
+
+def current_rss_kb():
+    """当前进程常驻内存（KB）"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # 非 Linux 平台只能拿到峰值
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def make_items(count, image_paths):
+    """生成合成记录，图片按顺序循环使用"""
+    base = datetime(2024, 1, 1)
+    items = []
+    for i in range(count):
+        t = base + timedelta(seconds=i)
+        items.append({
+            'id': t.strftime('%Y%m%d%H%M%S') + f'{i:06d}',
+            'image_path': image_paths[i % len(image_paths)],
+            'timestamp': t.strftime('%Y-%m-%d %H:%M:%S')
+        })
+    return items
+
+
+def make_sample_image(path, seed=0):
+    """生成一张示例图片（没有 PIL 时返回空路径）"""
+    try:
+        from PIL import Image as PILImage
+        color = (73 + seed * 37 % 180, 109 + seed * 17 % 140, 137 + seed * 7 % 110)
+        PILImage.new('RGB', (300, 300), color=color).save(path)
+        return path
+    except ImportError:
+        return ''
+
+
+def build_legacy_card(item):
+    """旧实现：每条记录一张完整卡片"""
+    card = BoxLayout(orientation='horizontal', size_hint_y=None, height=150,
+                     padding=10, spacing=10)
+    if item['image_path']:
+        card.add_widget(Image(source=item['image_path'], size_hint_x=0.3,
+                              allow_stretch=True, keep_ratio=True))
+    else:
+        card.add_widget(Label(text='No Image', size_hint_x=0.3))
+    info = BoxLayout(orientation='vertical', size_hint_x=0.5)
+    info.add_widget(Label(text=f"Time: {item['timestamp']}", size_hint_y=0.5))
+    info.add_widget(Label(text=f"ID: {item['id'][:8]}", size_hint_y=0.5))
+    card.add_widget(info)
+    card.add_widget(Button(text='Delete', size_hint_x=0.2))
+    return card
+
+
+class LegacyListApp(App):
+    """旧 GridLayout 列表"""
+    def __init__(self, items, **kwargs):
+        super().__init__(**kwargs)
+        self.items = items
+
+    def build(self):
+        self.scroll_view = ScrollView()
+        layout = GridLayout(cols=1, spacing=10, size_hint_y=None, padding=10)
+        layout.bind(minimum_height=layout.setter('height'))
+        for item in sorted(self.items, key=lambda x: x['timestamp'], reverse=True):
+            layout.add_widget(build_legacy_card(item))
+        self.scroll_view.add_widget(layout)
+        return self.scroll_view
+
+
+class RecycleListApp(ItemTrackerApp):
+    """当前 RecycleView 列表，数据不落盘"""
+    def __init__(self, items, **kwargs):
+        super().__init__(**kwargs)
+        self.bench_items = items
+
+    def load_data(self, on_loaded=None):
+        self.items = ItemCollection(self.bench_items)
+        self.display_items()
+        if on_loaded:
+            on_loaded()
+
+    def save_data(self):
+        pass
+
+    @property
+    def scroll_view(self):
+        return self.items_view
+
+
+class FrameRecorder:
+    """逐帧滚动列表并记录帧间隔"""
+    def __init__(self, app, frames):
+        self.app = app
+        self.frames = frames
+        self.samples = []
+        self.last = None
+
+    def start(self):
+        self.last = time.perf_counter()
+        Clock.schedule_interval(self.tick, 0)
+
+    def tick(self, dt):
+        now = time.perf_counter()
+        self.samples.append((now - self.last) * 1000.0)
+        self.last = now
+        # 从顶部匀速滚动到底部
+        progress = len(self.samples) / float(self.frames)
+        self.app.scroll_view.scroll_y = max(0.0, 1.0 - progress)
+        if len(self.samples) >= self.frames:
+            self.app.stop()
+            return False
+        return True
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--mode', choices=('recycle', 'grid'), default='recycle')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--images', type=int, default=1, help='number of distinct images')
+    args = parser.parse_args()
+
+    # 示例图片、缩略图和应用数据都放在临时目录中，不写入源码目录
+    work_dir = tempfile.mkdtemp(prefix='bench_item_list_')
+    os.environ['ITEM_TRACKER_DATA_DIR'] = work_dir
+    try:
+        run(args, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run(args, work_dir):
+    image_paths = [
+        make_sample_image(os.path.join(work_dir, f'_bench_sample_{i}.jpg'), i)
+        for i in range(max(1, args.images))
+    ]
+    items = make_items(args.items, image_paths)
+
+    rss_before = current_rss_kb()
+    build_start = time.perf_counter()
+    app = RecycleListApp(items) if args.mode == 'recycle' else LegacyListApp(items)
+    recorder = FrameRecorder(app, args.frames)
+    build_times = {}
+
+    def on_first_frame(dt):
+        build_times['first_frame'] = (time.perf_counter() - build_start) * 1000.0
+        build_times['rss_after_build'] = current_rss_kb()
+        recorder.start()
+
+    Clock.schedule_once(on_first_frame, 0)
+    app.run()
+    rss_after = current_rss_kb()
+
+    frame_times = recorder.samples[1:]
+    print(f"mode:              {args.mode}")
+    print(f"items:             {args.items}")
+    print(f"time to 1st frame: {build_times.get('first_frame', 0):.1f} ms")
+    print(f"frame time p50:    {percentile(frame_times, 50):.2f} ms")
+    print(f"frame time p95:    {percentile(frame_times, 95):.2f} ms")
+    print(f"frame time max:    {max(frame_times) if frame_times else 0:.2f} ms")
+    print(f"RSS before:        {rss_before / 1024.0:.1f} MB")
+    print(f"RSS after build:   {build_times.get('rss_after_build', 0) / 1024.0:.1f} MB")
+    print(f"RSS after scroll:  {rss_after / 1024.0:.1f} MB")
+    if args.mode == 'recycle':
+        stats = app.texture_cache.stats()
+        print(f"texture cache:     {stats['entries']} textures, "
+              f"{stats['bytes'] / 1048576.0:.1f}/{stats['max_bytes'] / 1048576.0:.0f} MB")
+        print(f"texture hits:      {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['evictions']} evictions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""快照加载基准测试：整体 json.load 与流式解析的峰值内存和首屏时间
+
+用法:
+    python benchmarks/bench_load.py [--items 100000] [--page-size 30]
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 命令行参数留给本脚本解析，不交给 Kivy
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from bench_records import make_items
+from records import ItemRecord, records_from_snapshot
+from storage import JournalStore
+
+
+def load_whole(data_file):
+    """原来的加载方式：整个文件读入并解析后再转换"""
+    with open(data_file, 'r', encoding='utf-8') as f:
+        return records_from_snapshot(json.load(f))
+
+
+def run(load):
+    """返回 (耗时 ms, 首屏 ms, 峰值内存 MB)；首屏为拿到第一页记录的时间"""
+    first_page = []
+    gc.collect()
+    start = time.perf_counter()
+    load(lambda items: first_page.append(time.perf_counter()))
+    elapsed = (time.perf_counter() - start) * 1000.0
+    first_ms = (first_page[0] - start) * 1000.0 if first_page else elapsed
+
+    # tracemalloc 会拖慢分配，峰值内存单独测一次
+    gc.collect()
+    tracemalloc.start()
+    load(lambda items: None)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, first_ms, peak / 1048576.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--page-size', type=int, default=30)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_load_')
+    try:
+        ItemRecord.set_base_dir(work_dir)
+        data_file = os.path.join(work_dir, 'items_data.json')
+        # 与应用相同，快照按最新在前写入
+        items = make_items(args.items, work_dir)
+        items.reverse()
+        JournalStore(data_file).compact([ItemRecord.from_dict(item) for item in items])
+        del items
+
+        def whole(on_first_page):
+            records = load_whole(data_file)
+            on_first_page(records[:args.page_size])
+            return records
+
+        def streaming(on_first_page):
+            return JournalStore(data_file).load(args.page_size, on_first_page)
+
+        print(f"items:       {args.items}")
+        print(f"file size:   {os.path.getsize(data_file) / 1e6:.1f} MB")
+        for name, load in (('json.load', whole), ('streaming', streaming)):
+            elapsed, first_ms, peak_mb = run(load)
+            print(f"{name:<12} total {elapsed:7.0f} ms   first page {first_ms:7.1f} ms   "
+                  f"peak memory {peak_mb:6.1f} MB")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
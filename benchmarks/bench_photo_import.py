@@ -0,0 +1,95 @@
+"""照片导入基准测试：吞吐量与压缩率
+
+用法:
+    python benchmarks/bench_photo_import.py [--count 20] [--width 4000] [--height 3000]
+    python benchmarks/bench_photo_import.py --source-dir /path/to/camera/photos
+
+不指定 --source-dir 时生成带 EXIF 旋转标记的合成照片。
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 命令行参数留给本脚本解析，不交给 Kivy
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from PIL import Image as PILImage
+
+from photo_import import import_photo
+
+
+def make_sample_photo(path, width, height, seed):
+    """生成一张带噪声纹理（难以压缩）和 EXIF 方向的 JPEG"""
+    noise = PILImage.effect_noise((width, height), 64 + seed % 32).convert('RGB')
+    gradient = PILImage.linear_gradient('L').resize((width, height)).convert('RGB')
+    img = PILImage.blend(noise, gradient, 0.5)
+    exif = PILImage.Exif()
+    exif[0x0112] = 6  # 需要顺时针旋转 90°
+    img.save(path, 'JPEG', quality=95, exif=exif)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=20)
+    parser.add_argument('--width', type=int, default=4000)
+    parser.add_argument('--height', type=int, default=3000)
+    parser.add_argument('--source-dir', help='use real photos instead of synthetic ones')
+    parser.add_argument('--max-dimension', type=int, default=2048)
+    parser.add_argument('--quality', type=int, default=85)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_import_')
+    try:
+        if args.source_dir:
+            names = sorted(n for n in os.listdir(args.source_dir)
+                           if n.lower().endswith(('.jpg', '.jpeg')))
+            sources = [os.path.join(args.source_dir, n) for n in names]
+        else:
+            sources = []
+            for i in range(args.count):
+                path = os.path.join(work_dir, f'sample_{i}.jpg')
+                make_sample_photo(path, args.width, args.height, i)
+                sources.append(path)
+
+        # 导入是就地进行的，先复制一份
+        targets = []
+        for i, source in enumerate(sources):
+            target = os.path.join(work_dir, f'import_{i}.jpg')
+            shutil.copyfile(source, target)
+            targets.append(target)
+
+        latencies = []
+        original_total = 0
+        stored_total = 0
+        start = time.perf_counter()
+        for target in targets:
+            t0 = time.perf_counter()
+            info = import_photo(target, args.max_dimension, args.quality)
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            original_total += info['original_size']
+            stored_total += info['stored_size']
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        count = len(targets)
+        print(f"photos:            {count}")
+        print(f"max dimension:     {args.max_dimension}")
+        print(f"quality:           {args.quality}")
+        if count:
+            print(f"throughput:        {count / elapsed:.2f} photos/s "
+                  f"({original_total / elapsed / 1e6:.1f} MB/s in)")
+            print(f"latency p50:       {latencies[count // 2]:.1f} ms")
+            print(f"latency max:       {latencies[-1]:.1f} ms")
+            print(f"original total:    {original_total / 1e6:.1f} MB")
+            print(f"stored total:      {stored_total / 1e6:.1f} MB "
+                  f"({100.0 * stored_total / original_total:.0f}%)")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
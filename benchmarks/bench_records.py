@@ -0,0 +1,103 @@
+"""记录格式基准测试：旧的 dict 列表 JSON 与紧凑记录格式的内存和加载时间
+
+用法:
+    python benchmarks/bench_records.py [--items 100000]
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 命令行参数留给本脚本解析，不交给 Kivy
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from records import ItemRecord
+from storage import JournalStore, write_json_atomic
+
+
+def make_items(count, base_dir):
+    """生成与拍照导入结果相同字段的合成记录"""
+    base = time.mktime((2024, 1, 1, 0, 0, 0, 0, 0, -1))
+    items = []
+    for i in range(count):
+        captured_at = base + i * 37.5
+        digest = f'{i:064x}'
+        items.append({
+            'id': time.strftime('%Y%m%d%H%M%S', time.localtime(captured_at)) + f'{i % 1000000:06d}',
+            'image_path': os.path.join(base_dir, 'images', digest[:2], digest + '.jpg'),
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(captured_at)),
+            'captured_at': captured_at,
+            'original_size': 3000000 + i,
+            'stored_size': 800000 + i,
+            'image_hash': digest,
+            'dhash': f'{(i * 2654435761) % (1 << 64):016x}'
+        })
+    return items
+
+
+def measure_load(load):
+    """返回 (结果, 耗时 ms, 结果占用的内存 MB)
+
+    tracemalloc 会显著拖慢分配，耗时和内存分两次测量。
+    """
+    gc.collect()
+    start = time.perf_counter()
+    result = load()
+    elapsed = (time.perf_counter() - start) * 1000.0
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = load()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, current / 1048576.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=100000)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_records_')
+    try:
+        ItemRecord.set_base_dir(work_dir)
+        items = make_items(args.items, work_dir)
+
+        legacy_file = os.path.join(work_dir, 'legacy.json')
+        write_json_atomic(legacy_file, items)
+        compact_file = os.path.join(work_dir, 'items_data.json')
+        store = JournalStore(compact_file)
+        store.compact([ItemRecord.from_dict(item) for item in items])
+        del items
+
+        def load_legacy():
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        legacy, legacy_ms, legacy_mb = measure_load(load_legacy)
+        del legacy
+        upgraded, upgrade_ms, _ = measure_load(JournalStore(legacy_file).load)
+        del upgraded
+        compact, compact_ms, compact_mb = measure_load(JournalStore(compact_file).load)
+
+        print(f"items:               {args.items}")
+        print(f"legacy file:         {os.path.getsize(legacy_file) / 1e6:.1f} MB")
+        print(f"compact file:        {os.path.getsize(compact_file) / 1e6:.1f} MB")
+        print(f"legacy load:         {legacy_ms:.0f} ms, {legacy_mb:.1f} MB (list of dicts)")
+        print(f"legacy -> records:   {upgrade_ms:.0f} ms (one-time upgrade)")
+        print(f"compact load:        {compact_ms:.0f} ms, {compact_mb:.1f} MB (ItemRecord)")
+        print(f"memory per item:     {legacy_mb * 1048576.0 / args.items:.0f} B -> "
+              f"{compact_mb * 1048576.0 / args.items:.0f} B")
+        del compact
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
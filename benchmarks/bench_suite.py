@@ -0,0 +1,341 @@
+"""无界面基准测试套件：存储、列表渲染和图片路径，与保存的基线对比
+
+用法:
+    python benchmarks/bench_suite.py [--sizes 1000,10000,100000] [--images 200]
+                                     [--baseline benchmarks/baseline.json] [--tolerance 0.25]
+                                     [--save-baseline]
+
+每个规模在单独的子进程中运行（峰值 RSS 互不影响），使用 Kivy 的 mock GL 后端，
+不需要显示器。测量项：
+    load_data      ItemTrackerApp.load_data 到回调完成（解析 + 建索引 + 显示第一页）
+    save_data      save_data 执行的快照压缩（store.compact）
+    display_items  重建列表第一页并完成布局
+    delete_item    删除单条记录（主线程部分，持久化在 I/O 线程中异步进行）
+    thumbnail      生成单张缩略图
+    texture_load   缩略图解码为纹理
+输出每项的吞吐量和延迟分位数，以及每个规模的峰值 RSS。与基线相比 p50 / p95 或峰值 RSS
+超出 tolerance（且差值超过噪声下限）时视为回归，退出码为 1。
+--save-baseline 把本次结果写入基线文件（在发布前的参考机器上运行）。
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+RESULT_PREFIX = 'BENCH_RESULT '
+# 差值小于该值（ms / MB）时不算回归，避免把计时抖动当成回归
+NOISE_FLOOR_MS = 2.0
+NOISE_FLOOR_MB = 8.0
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def summarize(samples_ms, units_per_sample=1, unit='ops'):
+    """延迟样本（ms）-> 吞吐量与分位数"""
+    total_s = sum(samples_ms) / 1000.0
+    return {
+        'count': len(samples_ms),
+        'unit': unit,
+        'throughput': units_per_sample * len(samples_ms) / total_s if total_s else 0.0,
+        'p50': percentile(samples_ms, 50),
+        'p95': percentile(samples_ms, 95),
+        'p99': percentile(samples_ms, 99),
+        'max': max(samples_ms) if samples_ms else 0.0
+    }
+
+
+def peak_rss_mb():
+    # Linux 上 ru_maxrss 单位为 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def make_images(data_dir, count):
+    """按内容存储的布局生成 count 张不同的图片，返回 [(哈希, 路径)]"""
+    from PIL import Image as PILImage
+
+    images = []
+    rng = random.Random(0)
+    for i in range(count):
+        img = PILImage.new('RGB', (640, 480), color=(i * 37 % 256, i * 17 % 256, i * 7 % 256))
+        # 加一些随机色块，使感知哈希和 JPEG 内容各不相同
+        for _ in range(8):
+            x, y = rng.randrange(600), rng.randrange(440)
+            color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+            img.paste(color, (x, y, x + 40, y + 40))
+        tmp_path = os.path.join(data_dir, f'_sample_{i}.jpg')
+        img.save(tmp_path, 'JPEG', quality=85)
+        with open(tmp_path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        path = os.path.join(data_dir, 'images', digest[:2], digest + '.jpg')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        images.append((digest, path))
+    return images
+
+
+def make_items(count, images, hashes):
+    """生成 count 条合成记录，图片按顺序循环使用"""
+    base = time.mktime((2024, 1, 1, 0, 0, 0, 0, 0, -1))
+    items = []
+    for i in range(count):
+        captured_at = base + i * 37.5
+        digest, path = images[i % len(images)]
+        item = {
+            'id': time.strftime('%Y%m%d%H%M%S', time.localtime(captured_at)) + f'{i % 1000000:06d}',
+            'image_path': path,
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(captured_at)),
+            'captured_at': captured_at,
+            'image_hash': digest,
+            'dhash': hashes[i % len(images)],
+            'original_size': 3000000 + i,
+            'stored_size': 800000 + i
+        }
+        if i % 5 == 0:
+            item['title'] = f'Item {i}'
+            item['tags'] = ['bench', f'group{i % 13}']
+        items.append(item)
+    return items
+
+
+def run_worker(size, image_count, repeat):
+    """在当前进程中测量一个规模，返回结果字典"""
+    data_dir = tempfile.mkdtemp(prefix='bench_suite_')
+    os.environ['ITEM_TRACKER_DATA_DIR'] = data_dir
+    try:
+        return measure(size, image_count, repeat, data_dir)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def measure(size, image_count, repeat, data_dir):
+    from kivy.config import Config
+    # 不限制帧率，Clock.tick() 不再为凑够 60 fps 而等待
+    Config.set('graphics', 'maxfps', '0')
+    from kivy.clock import Clock
+    from kivy.core.window import Window
+
+    import main
+    from records import ItemRecord
+    from similarity import dhash_batch
+    from storage import JournalStore
+    from texture_cache import TextureCache
+    from thumbnails import ThumbnailCache
+
+    class BenchApp(main.ItemTrackerApp):
+        """不弹出提示框、不自动加载的应用实例，由基准测试驱动"""
+        def show_message(self, title, message):
+            pass
+
+        def load_initial_items(self, dt):
+            pass
+
+    def drain(app):
+        """写入待写变更，推进时钟直到 I/O 线程中的任务全部完成"""
+        app.flush_pending_writes()
+        while app.io.pending or app.image_io.pending:
+            time.sleep(0.001)
+            Clock.tick()
+
+    def timed_frames(fn, frames=2):
+        """执行 fn 并推进若干帧（RecycleView 在下一帧布局），返回耗时 ms"""
+        start = time.perf_counter()
+        fn()
+        for _ in range(frames):
+            Clock.tick()
+        return (time.perf_counter() - start) * 1000.0
+
+    # 准备数据：图片、记录和快照（与 save_data 写出的格式相同）
+    ItemRecord.set_base_dir(data_dir)
+    images = make_images(data_dir, min(image_count, size))
+    hashes = dhash_batch([path for _, path in images])
+    items = make_items(size, images, hashes)
+    JournalStore(os.path.join(data_dir, 'items_data.json')).compact(
+        [ItemRecord.from_dict(item) for item in items]
+    )
+    del items
+
+    app = BenchApp()
+    root = app.build()
+    Window.add_widget(root)
+    Clock.tick()
+    metrics = {}
+
+    samples = []
+    for _ in range(repeat):
+        done = []
+        start = time.perf_counter()
+        app.load_data(on_loaded=lambda: done.append(time.perf_counter()))
+        while not done:
+            time.sleep(0.001)
+            Clock.tick()
+        samples.append((done[0] - start) * 1000.0)
+    metrics['load_data'] = summarize(samples, size, 'items')
+    drain(app)
+
+    samples = []
+    for _ in range(repeat):
+        snapshot = list(app.items)
+        start = time.perf_counter()
+        app.store.compact(snapshot)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    metrics['save_data'] = summarize(samples, size, 'items')
+
+    samples = [timed_frames(app.display_items) for _ in range(max(10, repeat * 5))]
+    metrics['display_items'] = summarize(samples)
+
+    rng = random.Random(size)
+    victims = rng.sample([item['id'] for item in app.items], min(200, len(app.items) // 2))
+    samples = []
+    for item_id in victims:
+        samples.append(timed_frames(lambda: app.delete_item(item_id), frames=1))
+    metrics['delete_item'] = summarize(samples)
+    drain(app)
+
+    # 列表显示时已生成了部分缩略图，使用新的缓存目录测量冷启动生成
+    thumbnail_cache = ThumbnailCache(os.path.join(data_dir, 'bench_thumbnails'))
+    samples = []
+    thumbs = []
+    for _, path in images:
+        start = time.perf_counter()
+        thumbs.append((path, thumbnail_cache._generate(path)))
+        samples.append((time.perf_counter() - start) * 1000.0)
+    metrics['thumbnail'] = summarize(samples)
+
+    cache = TextureCache()
+    samples = []
+    for path, thumb_path in thumbs:
+        start = time.perf_counter()
+        cache.load(path, thumb_path)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    metrics['texture_load'] = summarize(samples)
+
+    app.image_io.shutdown()
+    app.io.shutdown()
+    return {'size': size, 'images': len(images), 'metrics': metrics, 'peak_rss_mb': peak_rss_mb()}
+
+
+def run_size(size, args):
+    """在子进程中运行一个规模"""
+    env = dict(os.environ)
+    env['KIVY_NO_ARGS'] = '1'
+    env.setdefault('KIVY_GL_BACKEND', 'mock')
+    env.setdefault('KIVY_LOG_MODE', 'PYTHON')
+    command = [
+        sys.executable, os.path.abspath(__file__), '--worker', str(size),
+        '--images', str(args.images), '--repeat', str(args.repeat)
+    ]
+    proc = subprocess.run(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    sys.stderr.write(proc.stderr[-4000:])
+    raise RuntimeError(f'benchmark for {size} items failed (exit code {proc.returncode})')
+
+
+def print_result(result):
+    print(f"\n== {result['size']} items ({result['images']} images), "
+          f"peak RSS {result['peak_rss_mb']:.1f} MB")
+    print(f"{'metric':<14} {'throughput':>16} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, m in result['metrics'].items():
+        throughput = f"{m['throughput']:.0f} {m['unit']}/s"
+        print(f"{name:<14} {throughput:>16} {m['p50']:9.2f} {m['p95']:9.2f} "
+              f"{m['p99']:9.2f} {m['max']:9.2f}")
+
+
+def compare(results, baseline, tolerance):
+    """与基线对比，返回回归描述列表"""
+    regressions = []
+    limit = 1.0 + tolerance
+    for result in results:
+        base = baseline.get(str(result['size']))
+        if base is None:
+            print(f"\nno baseline for {result['size']} items")
+            continue
+        for name, m in result['metrics'].items():
+            base_m = base['metrics'].get(name)
+            if base_m is None:
+                continue
+            for key in ('p50', 'p95'):
+                current, previous = m[key], base_m[key]
+                if current > previous * limit and current - previous > NOISE_FLOOR_MS:
+                    regressions.append(
+                        f"{result['size']} items {name} {key}: "
+                        f"{previous:.2f} -> {current:.2f} ms ({current / previous - 1:+.0%})"
+                    )
+        current, previous = result['peak_rss_mb'], base['peak_rss_mb']
+        if current > previous * limit and current - previous > NOISE_FLOOR_MB:
+            regressions.append(
+                f"{result['size']} items peak RSS: {previous:.1f} -> {current:.1f} MB "
+                f"({current / previous - 1:+.0%})"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--images', type=int, default=200, help='number of distinct images')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(args.worker, args.images, args.repeat)
+        print(RESULT_PREFIX + json.dumps(result))
+        return 0
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(',') if s.strip()):
+        result = run_size(size, args)
+        print_result(result)
+        results.append(result)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update({str(result['size']): result for result in results})
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nbaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nno baseline at {args.baseline} (run with --save-baseline to record one)")
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regressions (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nno regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
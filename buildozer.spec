@@ -6,6 +6,7 @@ package.domain = org.example
 
 source.dir = .
 source.include_exts = py,png,jpg,kv,atlas,json
+source.exclude_dirs = benchmarks
 
 version = 1.0
 
@@ -0,0 +1,159 @@
+"""内存中的有序物品集合"""
+import bisect
+import time
+from datetime import datetime
+
+
+def capture_time(item):
+    """记录的拍摄时间（epoch 秒）
+
+    新记录直接保存 captured_at；旧记录从 id（精确到微秒）或 timestamp 字符串推算。
+    """
+    value = item.get('captured_at')
+    if value is not None:
+        return float(value)
+    try:
+        return datetime.strptime(item.get('id', ''), '%Y%m%d%H%M%S%f').timestamp()
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(item.get('timestamp', ''), '%Y-%m-%d %H:%M:%S').timestamp()
+    except ValueError:
+        return 0.0
+
+
+def bucket_key(captured_at, granularity='day'):
+    """拍摄时间所在的分组：'YYYY-MM-DD'（按天）或 'YYYY-MM'（按月），本地时间"""
+    t = time.localtime(captured_at)
+    if granularity == 'month':
+        return f'{t.tm_year:04d}-{t.tm_mon:02d}'
+    return f'{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}'
+
+
+def bucket_range(key):
+    """分组键 -> [开始, 结束) 的 epoch 秒"""
+    parts = [int(part) for part in key.split('-')]
+    if len(parts) == 2:
+        year, month = parts
+        start = time.mktime((year, month, 1, 0, 0, 0, 0, 0, -1))
+        end = time.mktime((year + month // 12, month % 12 + 1, 1, 0, 0, 0, 0, 0, -1))
+    else:
+        year, month, day = parts
+        start = time.mktime((year, month, day, 0, 0, 0, 0, 0, -1))
+        # mktime 会规范化溢出的日期（如 1 月 32 日）
+        end = time.mktime((year, month, day + 1, 0, 0, 0, 0, 0, -1))
+    return start, end
+
+
+class ItemCollection:
+    """按 (captured_at, id) 排序的物品集合
+
+    排序键列表用 bisect 维护，另有 id -> 记录 的字典；按 id 查找 O(1)，
+    定位 / 插入 / 删除位置 O(log N)。迭代和位置下标都是最新在前，与列表显示顺序一致。
+    另按天 / 按月维护每个分组的记录数，随插入 / 删除增量更新；分组在列表中的位置和
+    时间范围内的记录都由排序键二分得到，只与结果条数有关。
+    """
+    def __init__(self, items=()):
+        self._items = {}
+        self._last_capture = 0.0
+        self._bucket_counts = {'day': {}, 'month': {}}
+
+        for item in items:
+            self._items[item.get('id', '')] = item
+        self._keys = sorted(self._key(item) for item in self._items.values())
+        for captured_at, _ in self._keys:
+            self._count_bucket(captured_at, 1)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        for _, item_id in reversed(self._keys):
+            yield self._items[item_id]
+
+    def __contains__(self, item_id):
+        return item_id in self._items
+
+    def get(self, item_id):
+        return self._items.get(item_id)
+
+    def next_capture_time(self):
+        """单调递增的拍摄时间，同一秒内的多次拍摄也能稳定排序"""
+        now = time.time()
+        if now <= self._last_capture:
+            now = self._last_capture + 1e-6
+        return now
+
+    def add(self, item):
+        """插入记录，返回其位置（最新在前）"""
+        item_id = item.get('id', '')
+        if item_id in self._items:
+            self.remove(item_id)
+        key = self._key(item)
+        self._items[item_id] = item
+        position = bisect.bisect_left(self._keys, key)
+        self._keys.insert(position, key)
+        self._count_bucket(key[0], 1)
+        return len(self._keys) - 1 - position
+
+    def remove(self, item_id):
+        """删除记录，返回 (记录, 删除前的位置)；不存在时返回 (None, -1)"""
+        item = self._items.get(item_id)
+        if item is None:
+            return None, -1
+        position = self._position(item)
+        self._count_bucket(self._keys[position][0], -1)
+        del self._keys[position]
+        del self._items[item_id]
+        return item, len(self._keys) - position
+
+    def newest(self, limit, offset=0):
+        """按最新在前取一页记录"""
+        end = len(self._keys) - offset
+        start = max(0, end - limit)
+        return [self._items[item_id] for _, item_id in reversed(self._keys[start:end])]
+
+    def ordered(self, item_ids):
+        """按最新在前返回给定 id 的记录（忽略不存在的 id）"""
+        keys = sorted(
+            (self._key(self._items[item_id]) for item_id in item_ids if item_id in self._items),
+            reverse=True
+        )
+        return [self._items[item_id] for _, item_id in keys]
+
+    def buckets(self, granularity='day'):
+        """[(分组键, 记录数)]，最新在前"""
+        counts = self._bucket_counts[granularity]
+        return [(key, counts[key]) for key in sorted(counts, reverse=True)]
+
+    def bucket_count(self, key, granularity='day'):
+        return self._bucket_counts[granularity].get(key, 0)
+
+    def range_items(self, start, end, limit=None, offset=0):
+        """拍摄时间在 [start, end) 内的记录，最新在前"""
+        low = bisect.bisect_left(self._keys, (start,))
+        high = bisect.bisect_left(self._keys, (end,)) - offset
+        if limit is not None:
+            low = max(low, high - limit)
+        return [self._items[item_id] for _, item_id in reversed(self._keys[low:max(low, high)])]
+
+    def _count_bucket(self, captured_at, delta):
+        for granularity, counts in self._bucket_counts.items():
+            key = bucket_key(captured_at, granularity)
+            count = counts.get(key, 0) + delta
+            if count > 0:
+                counts[key] = count
+            else:
+                counts.pop(key, None)
+
+    def _key(self, item):
+        """排序键 (captured_at, id)，旧记录补上 captured_at"""
+        if 'captured_at' not in item:
+            item['captured_at'] = capture_time(item)
+        captured_at = float(item['captured_at'])
+        if captured_at > self._last_capture:
+            self._last_capture = captured_at
+        return captured_at, item.get('id', '')
+
+    def _position(self, item):
+        return bisect.bisect_left(self._keys, self._key(item))
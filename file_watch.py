@@ -0,0 +1,132 @@
+"""等待相机写完照片文件"""
+import os
+import select
+import struct
+import threading
+import time
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def open_inotify(directory):
+    """为目录创建 inotify 描述符（Linux / Android），不可用时返回 None"""
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK)
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+def read_inotify_names(fd):
+    """读取已到达的事件，返回写完 / 移入的文件名集合"""
+    names = set()
+    try:
+        buf = os.read(fd, 4096)
+    except BlockingIOError:
+        return names
+    offset = 0
+    while offset + _EVENT_HEADER.size <= len(buf):
+        _, mask, _, length = _EVENT_HEADER.unpack_from(buf, offset)
+        offset += _EVENT_HEADER.size
+        name = buf[offset:offset + length].rstrip(b'\0')
+        offset += length
+        if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+            names.add(os.fsdecode(name))
+    return names
+
+
+class FileReadyWatcher:
+    """在后台线程中等待文件就绪
+
+    收到 inotify 写完通知，或文件非空且大小在 settle_time 内没有变化，即视为就绪。
+    检查间隔从 initial_interval 按 backoff 倍数增长到 max_interval；
+    有 inotify 时，目录事件会提前唤醒等待，且静止判断放宽到 3 倍 settle_time
+    （部分外部存储上 inotify 收不到其他进程的写入，仍需靠静止判断兜底）。
+    on_ready(size) / on_timeout(last_size) 在主线程回调，last_size 为 None 表示文件不存在。
+    """
+    def __init__(self, path, on_ready, on_timeout, timeout=10.0, settle_time=0.3,
+                 initial_interval=0.02, max_interval=0.5, backoff=1.5):
+        self.path = path
+        self.on_ready = on_ready
+        self.on_timeout = on_timeout
+        self.timeout = timeout
+        self.settle_time = settle_time
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self._cancelled = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, name='FileReadyWatcher', daemon=True).start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _run(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        interval = self.initial_interval
+        name = os.path.basename(self.path)
+        fd = open_inotify(os.path.dirname(self.path) or '.')
+        settle_time = self.settle_time * 3 if fd is not None else self.settle_time
+        last_size = None
+        changed_at = started
+        closed = False
+
+        try:
+            while not self._cancelled.is_set():
+                size, age = self._stat()
+                now = time.monotonic()
+                if size != last_size:
+                    # 首次看到文件时按 mtime 估算已静止的时间，已写完的文件无需再等
+                    changed_at = now - age if last_size is None else now
+                settled = now - changed_at >= settle_time
+                if size and (closed or settled):
+                    waited = (time.monotonic() - started) * 1000.0
+                    Logger.info(f"FileWatch: {name} ready after {waited:.0f} ms ({size} bytes)")
+                    self._deliver(self.on_ready, size)
+                    return
+                last_size = size
+
+                remaining = deadline - now
+                if remaining <= 0:
+                    Logger.warning(f"FileWatch: Timed out waiting for {name}")
+                    self._deliver(self.on_timeout, last_size)
+                    return
+
+                wait = min(interval, remaining)
+                if fd is not None:
+                    readable, _, _ = select.select([fd], [], [], wait)
+                    if readable and name in read_inotify_names(fd):
+                        closed = True
+                else:
+                    time.sleep(wait)
+                interval = min(interval * self.backoff, self.max_interval)
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def _stat(self):
+        """返回 (大小, 距上次修改的秒数)，文件不存在时为 (None, 0)"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None, 0.0
+        return st.st_size, max(0.0, time.time() - st.st_mtime)
+
+    def _deliver(self, callback, value):
+        if not self._cancelled.is_set():
+            Clock.schedule_once(lambda dt: callback(value))
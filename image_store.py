@@ -0,0 +1,126 @@
+"""按内容哈希存储照片"""
+import hashlib
+import os
+import threading
+
+from kivy.logger import Logger
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    """流式计算文件的 SHA-256，内存占用与文件大小无关"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentStore:
+    """内容寻址的图片存储
+
+    照片按哈希保存在 <root>/<前两位>/<哈希><扩展名>，相同内容只存一份。
+    每条记录的 image_hash 计一次引用，最后一条记录删除后才删除文件。
+    put() / remove_unreferenced() 在后台线程中执行，引用计数由锁保护，
+    因此删除与同内容的新照片并发时不会误删。
+    put() 之后、记录加入集合之前的引用记在 pending 中，rebuild() 时保留；
+    记录加入集合时调用 claim()。
+    """
+    def __init__(self, root):
+        self.root = root
+        self.refcounts = {}
+        # 已入库但记录还没有加入集合的引用：{哈希: 次数}
+        self.pending = {}
+        self._lock = threading.Lock()
+
+        if not os.path.exists(self.root):
+            os.makedirs(self.root)
+
+    def path_for(self, digest, ext='.jpg'):
+        return os.path.join(self.root, digest[:2], digest + ext)
+
+    def put(self, source_path):
+        """把文件移入存储并增加一次引用，返回 (哈希, 存储路径, 是否重复)"""
+        digest = hash_file(source_path)
+        ext = os.path.splitext(source_path)[1].lower() or '.jpg'
+        return self._adopt(source_path, digest, ext)
+
+    def put_stream(self, fileobj, ext='.jpg'):
+        """从文件对象分块复制到存储（边复制边计算哈希）并增加一次引用，返回值同 put()"""
+        hasher = hashlib.sha256()
+        tmp_path = os.path.join(self.root, f'.incoming-{threading.get_ident()}.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+                    f.write(chunk)
+            return self._adopt(tmp_path, hasher.hexdigest(), ext)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _adopt(self, source_path, digest, ext):
+        """把已算好哈希的文件移入存储（重复时丢弃）并增加一次引用"""
+        target = self.path_for(digest, ext)
+
+        with self._lock:
+            self.refcounts[digest] = self.refcounts.get(digest, 0) + 1
+            self.pending[digest] = self.pending.get(digest, 0) + 1
+            if os.path.exists(target):
+                # 相同内容已存在，丢弃新文件
+                os.remove(source_path)
+                Logger.info(f"ContentStore: Duplicate photo {digest[:12]}, stored once")
+                return digest, target, True
+
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(source_path, target)
+            return digest, target, False
+
+    def claim(self, digest):
+        """put() 得到的引用已由集合中的记录持有（主线程，记录加入集合时调用）"""
+        if not digest:
+            return
+        with self._lock:
+            count = self.pending.get(digest, 0) - 1
+            if count > 0:
+                self.pending[digest] = count
+            else:
+                self.pending.pop(digest, None)
+
+    def rebuild(self, items):
+        """按记录重建引用计数，保留正在导入（尚未加入集合）的照片的引用"""
+        refcounts = {}
+        for item in items:
+            digest = item.get('image_hash')
+            if digest:
+                refcounts[digest] = refcounts.get(digest, 0) + 1
+        with self._lock:
+            for digest, count in self.pending.items():
+                refcounts[digest] = refcounts.get(digest, 0) + count
+            self.refcounts = refcounts
+
+    def release(self, digest):
+        """减少一次引用，没有引用时返回 True（调用方应提交 remove_unreferenced）"""
+        with self._lock:
+            count = self.refcounts.get(digest, 0) - 1
+            if count > 0:
+                self.refcounts[digest] = count
+                return False
+            self.refcounts.pop(digest, None)
+            return True
+
+    def remove_unreferenced(self, digest, path, before_remove=None):
+        """文件仍无引用时删除（后台线程），返回是否删除
+
+        before_remove(path) 在删除前调用，用于清理依赖原文件的缓存（如缩略图）。
+        """
+        with self._lock:
+            if self.refcounts.get(digest, 0) > 0:
+                return False
+            if not os.path.exists(path):
+                return False
+            if before_remove:
+                before_remove(path)
+            os.remove(path)
+            return True
@@ -0,0 +1,97 @@
+"""后台文件 I/O 执行器"""
+import queue
+import threading
+from collections import deque
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+
+class IOExecutor:
+    """单个工作线程按提交顺序串行执行 I/O 任务
+
+    写操作因此保持有序；结果和异常放入完成队列，通过 Clock.schedule_once 回到主线程
+    按完成顺序回调（退出时可用 drain() 立即执行）。
+    on_pending_changed(count) 在主线程调用，用于显示进行中状态。
+    """
+    def __init__(self, name='IOWorker', on_pending_changed=None):
+        self.name = name
+        self.on_pending_changed = on_pending_changed
+        self.pending = 0
+        self._queue = queue.Queue()
+        # (回调, 结果) 按完成顺序排队，在主线程中取出执行
+        self._finished = deque()
+        self._thread = threading.Thread(target=self._worker, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, on_done=None, on_error=None, **kwargs):
+        """提交任务（必须在主线程调用）
+
+        on_done(result) / on_error(exception) 在主线程回调。
+        """
+        self.pending += 1
+        self._notify_pending()
+        self._queue.put((fn, args, kwargs, on_done, on_error))
+
+    def wait(self, timeout=5.0):
+        """阻塞等待已提交的任务全部执行完（必须在主线程调用），超时返回 False
+
+        回调仍在之后的帧中执行；用于 on_pause 等需要确认数据已落盘的时机。
+        """
+        if not self._thread.is_alive():
+            # 已经停止（如 on_stop 被调用两次），没有可等待的任务
+            return True
+        done = threading.Event()
+        self.submit(done.set)
+        if not done.wait(timeout):
+            Logger.warning(f"IOExecutor: {self.name} still busy after {timeout}s")
+            return False
+        return True
+
+    def drain(self, timeout=5.0):
+        """等待已提交的任务执行完，并在当前（主）线程中立即执行它们的回调
+
+        用于 on_stop：之后不再有帧，排在 Clock 中的回调不会再执行。
+        """
+        finished = self.wait(timeout)
+        self._deliver()
+        return finished
+
+    def shutdown(self, timeout=5.0):
+        """等待已提交的任务完成后停止工作线程"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            Logger.warning(f"IOExecutor: {self.name} did not finish within {timeout}s")
+
+    def _worker(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                break
+            fn, args, kwargs, on_done, on_error = task
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                Logger.error(f"IOExecutor: Task {getattr(fn, '__name__', fn)} failed: {e}")
+                self._finished.append((on_error, e))
+            else:
+                self._finished.append((on_done, result))
+            Clock.schedule_once(lambda dt: self._deliver())
+
+    def _deliver(self):
+        """按完成顺序执行已完成任务的回调（主线程）"""
+        while self._finished:
+            callback, value = self._finished.popleft()
+            self.pending -= 1
+            self._notify_pending()
+            if callback is None:
+                continue
+            try:
+                callback(value)
+            except Exception as e:
+                Logger.error(f"IOExecutor: Callback failed: {e}")
+
+    def _notify_pending(self):
+        if self.on_pending_changed:
+            self.on_pending_changed(self.pending)
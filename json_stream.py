@@ -0,0 +1,222 @@
+"""流式读取大 JSON 文件中的数组"""
+import json
+import re
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# 查找元素边界时需要关心的记号：完整字符串、未结束的字符串、括号和逗号
+_SCAN_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|"|[\[\]{},]')
+
+
+class ArrayStream:
+    """逐个读取 JSON 数组的元素，内存占用只有一个读取块
+
+    顶层为数组时读取该数组；顶层为对象时读取 key 对应的数组，数组之前的字段保存在
+    header 中（数组之后的字段忽略）。格式损坏的元素跳过，(文件偏移, 原因) 记录在
+    errors 中，后面的元素照常读取；文件被截断时保留截断前的元素。
+    文件开头的结构无法识别时抛出 ValueError。
+
+    元素之间以换行分隔时（见 storage.write_rows_atomic），每个读取块中完整的若干行
+    一次解析；其余情况（或该块中有损坏的元素）逐个元素解析。
+    """
+    def __init__(self, f, key=None, chunk_size=64 * 1024):
+        self.f = f
+        self.key = key
+        self.chunk_size = chunk_size
+        self.header = None
+        self.errors = []
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._offset = 0
+        self._eof = False
+        self._opened = False
+
+    @property
+    def offset(self):
+        """当前读取位置在文件中的偏移（字符）"""
+        return self._offset + self._pos
+
+    def open(self):
+        """解析文件开头并定位到数组的第一个元素之前（读取 header），结构无法识别时抛出 ValueError"""
+        if not self._opened:
+            self._open_array()
+            self._opened = True
+        return self
+
+    def __iter__(self):
+        self.open()
+        # 整块解析失败时，逐个解析到该文件偏移后再尝试整块解析
+        slow_until = 0
+        while True:
+            if not self._skip_whitespace():
+                self._error('unexpected end of file')
+                return
+            if self._buf[self._pos] == ']':
+                return
+
+            batch = self._decode_lines() if self.offset >= slow_until else None
+            if batch is not None:
+                values, separated = batch
+                yield from values
+                if separated:
+                    continue
+            else:
+                if self.offset >= slow_until:
+                    slow_until = self._offset + max(self._buf.rfind('\n'), self._pos + 1)
+                try:
+                    value, end = self._decode()
+                except ValueError as e:
+                    # _decode 读入新数据后 _pos 仍指向元素开头
+                    if not self._skip_element(self._pos, getattr(e, 'msg', str(e))):
+                        return
+                else:
+                    self._pos = end
+                    yield value
+
+            if not self._skip_whitespace():
+                self._error('unexpected end of file')
+                return
+            char = self._buf[self._pos]
+            if char == ',':
+                self._pos += 1
+            elif char != ']':
+                # 元素后面不是分隔符，跳到下一个元素
+                if not self._skip_element(self._pos, f'unexpected {char!r}'):
+                    return
+                if self._buf[self._pos] == ',':
+                    self._pos += 1
+
+    def _decode_lines(self):
+        """一次解析缓冲区中到最后一个换行为止的完整元素
+
+        返回 (元素列表, 最后一个元素后是否已有逗号)；没有完整的行或解析失败时返回 None。
+        """
+        end = self._buf.rfind('\n', self._pos)
+        if end < 0:
+            return None
+        text = self._buf[self._pos:end].rstrip()
+        separated = text.endswith(',')
+        if separated:
+            text = text[:-1]
+        if not text:
+            return None
+        try:
+            values = json.loads('[' + text + ']')
+        except ValueError:
+            return None
+        self._pos = end + 1
+        return values, separated
+
+    def _open_array(self):
+        """定位到数组的第一个元素之前"""
+        if not self._skip_whitespace():
+            raise ValueError('empty file')
+        char = self._buf[self._pos]
+        if char == '[':
+            self._pos += 1
+            return
+        if char != '{' or self.key is None:
+            raise ValueError(f'unexpected {char!r} at start of file')
+
+        self._pos += 1
+        self.header = {}
+        while True:
+            if not self._skip_whitespace():
+                raise ValueError(f'{self.key!r} not found')
+            if self._buf[self._pos] == '}':
+                raise ValueError(f'{self.key!r} not found')
+            name, self._pos = self._decode()
+            self._expect(':')
+            if name == self.key:
+                self._expect('[')
+                return
+            self.header[name], self._pos = self._decode()
+            if not self._skip_whitespace():
+                raise ValueError(f'{self.key!r} not found')
+            if self._buf[self._pos] == ',':
+                self._pos += 1
+
+    def _expect(self, char):
+        if not self._skip_whitespace() or self._buf[self._pos] != char:
+            raise ValueError(f'expected {char!r} at offset {self._offset + self._pos}')
+        self._pos += 1
+
+    def _decode(self):
+        """解析当前位置的一个值，缓冲区中数据不完整时继续读取"""
+        if not self._skip_whitespace():
+            raise ValueError('unexpected end of file')
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except ValueError:
+                # 只有确定元素已经完整（找到边界）或文件已读完才算格式错误
+                if self._eof or self._scan_boundary(self._pos) is not None:
+                    raise
+                self._fill()
+                continue
+            # 数字可能被读取块截断，值恰好在缓冲区末尾时再读一块确认
+            if end == len(self._buf) and not self._eof:
+                self._fill()
+                continue
+            return value, end
+
+    def _skip_element(self, start, reason):
+        """跳过一个损坏的元素，停在其后的 ',' 或 ']' 上；文件截断时返回 False"""
+        while True:
+            boundary = self._scan_boundary(start)
+            if boundary is not None:
+                self._error(reason, start)
+                self._pos = boundary
+                return True
+            if self._eof:
+                self._error(f'truncated ({reason})', start)
+                return False
+            start -= self._pos
+            self._fill()
+
+    def _scan_boundary(self, start):
+        """从 start 开始找到当前元素结束处（深度为 0 的 ',' 或 ']'），缓冲区内找不到时返回 None"""
+        depth = 0
+        for match in _SCAN_TOKEN.finditer(self._buf, start):
+            token = match.group()
+            if token == '"':
+                return None
+            if token in '[{':
+                depth += 1
+            elif token in ']}':
+                depth -= 1
+                if depth < 0:
+                    if token == ']':
+                        return match.start()
+                    # 多余的 '}' 算作损坏元素的一部分，否则会停在原处反复跳过
+                    depth = 0
+            elif token == ',' and depth == 0:
+                return match.start()
+        return None
+
+    def _skip_whitespace(self):
+        """跳过空白，到达文件末尾时返回 False"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return True
+            if not self._fill():
+                return False
+
+    def _fill(self):
+        """丢弃已解析的部分并读入下一块，没有更多数据时返回 False"""
+        if self._eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        self._offset += self._pos
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        if not chunk:
+            self._eof = True
+            return False
+        return True
+
+    def _error(self, reason, position=None):
+        if position is None:
+            position = self._pos
+        self.errors.append((self._offset + position, reason))
@@ -1,134 +1,259 @@
+import time
+
+# 冷启动计时起点（在导入 Kivy 之前）
+STARTUP_STARTED_AT = time.perf_counter()
+
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
+from kivy.uix.checkbox import CheckBox
+from kivy.uix.gridlayout import GridLayout
 from kivy.uix.image import Image
 from kivy.uix.label import Label
-from kivy.uix.scrollview import ScrollView
-from kivy.uix.gridlayout import GridLayout
 from kivy.uix.popup import Popup
+from kivy.uix.progressbar import ProgressBar
+from kivy.uix.textinput import TextInput
+from kivy.uix.behaviors import ButtonBehavior
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.scrollview import ScrollView
+from kivy.properties import StringProperty
+from kivy.metrics import dp
 from kivy.utils import platform
 from kivy.logger import Logger
-from kivy.core.text import LabelBase
 from kivy.clock import Clock
-import json
 import os
 from datetime import datetime
 
-# 注册中文字体
-if platform == 'android':
-    chinese_fonts = [
-        '/system/fonts/NotoSansCJK-Regular.ttc',
-        '/system/fonts/NotoSansSC-Regular.otf',
-        '/system/fonts/DroidSansFallback.ttf',
-        '/system/fonts/NotoSansHans-Regular.otf',
-    ]
-    
-    for font_path in chinese_fonts:
-        if os.path.exists(font_path):
-            try:
-                LabelBase.register(name='Roboto', fn_regular=font_path)
-                Logger.info(f"App: Registered Chinese font: {font_path}")
-                break
-            except Exception as e:
-                Logger.warning(f"App: Failed to register font {font_path}: {e}")
+from android_bridge import ensure_permissions, java_class, register_chinese_font
+from collection import ItemCollection, bucket_key, bucket_range, capture_time
+from file_watch import FileReadyWatcher
+from image_store import ContentStore
+from io_executor import IOExecutor
+from perf import StartupTimer, profiler
+from photo_import import import_photo
+from records import ItemRecord, as_record
+from search_index import SearchIndex, parse_tags
+from similarity import SimilarityIndex, dhash, dhash_batch
+from storage import open_store
+from storage_gc import StorageReconciler
+from texture_cache import TextureCache
+from thumbnails import ThumbnailCache
+from write_behind import WriteBehind
 
-# Android 权限和类
-if platform == 'android':
+
+def write_test_image(filepath):
+    """生成桌面测试用图片"""
     try:
-        from android.permissions import request_permissions, Permission
-        from jnius import autoclass, cast
-        
-        request_permissions([
-            Permission.CAMERA,
-            Permission.WRITE_EXTERNAL_STORAGE,
-            Permission.READ_EXTERNAL_STORAGE
-        ])
-        
-        # Android 类
-        PythonActivity = autoclass('org.kivy.android.PythonActivity')
-        Intent = autoclass('android.content.Intent')
-        MediaStore = autoclass('android.provider.MediaStore')
-        Uri = autoclass('android.net.Uri')
-        File = autoclass('java.io.File')
-        BitmapFactory = autoclass('android.graphics.BitmapFactory')
-        FileOutputStream = autoclass('java.io.FileOutputStream')
-        
-        Logger.info("App: Android modules loaded successfully")
-    except Exception as e:
-        Logger.error(f"App: Failed to load Android modules: {e}")
+        from PIL import Image as PILImage
+        img = PILImage.new('RGB', (300, 300), color=(73, 109, 137))
+        img.save(filepath)
+    except:
+        with open(filepath, 'wb') as f:
+            f.write(b'\xff\xd8\xff\xe0')
+
+
+class CardImage(ButtonBehavior, Image):
+    """卡片缩略图，点击后打开原图"""
+    pass
 
 
-class ItemCard(BoxLayout):
-    """单个物品卡片组件"""
-    def __init__(self, item_data, delete_callback, **kwargs):
+class SectionHeader(Label):
+    """列表中的日期分组标题（按天 / 按月分组时插在每组第一张卡片之前）"""
+    def __init__(self, **kwargs):
+        kwargs.setdefault('font_name', 'Roboto')
         super().__init__(**kwargs)
-        self.orientation = 'horizontal'
-        self.size_hint_y = None
-        self.height = 150
-        self.padding = 10
-        self.spacing = 10
-        
-        self.item_data = item_data
-        self.delete_callback = delete_callback
-        
-        # 图片
+        self.halign = 'left'
+        self.valign = 'middle'
+        self.bold = True
+        self.bind(size=self.setter('text_size'))
+
+
+class ItemCard(RecycleDataViewBehavior, BoxLayout):
+    """单个物品卡片组件（由 RecycleView 复用，只创建屏幕可见数量的实例）"""
+    item_id = StringProperty('')
+    title = StringProperty('')
+    tags_text = StringProperty('')
+    image_path = StringProperty('')
+    timestamp = StringProperty('')
+    
+    # 已创建的卡片数量，用于统计每次操作新建了多少卡片
+    created_count = 0
+    # 每张卡片包含的控件数（卡片本身 + 子控件）
+    widgets_per_card = 12
+
+    def __init__(self, **kwargs):
+        with profiler.span('card_build'):
+            super().__init__(**kwargs)
+            ItemCard.created_count += 1
+            self.orientation = 'horizontal'
+            self.padding = 10
+            self.spacing = 10
+            self.index = None
+            
+            # 多选模式下的勾选框（非多选模式时宽度为 0）
+            self.select_box = CheckBox(size_hint_x=None, width=0, opacity=0)
+            self.select_box.bind(on_release=self.on_select_toggled)
+            self.add_widget(self.select_box)
+            
+            # 图片区域：Image 与占位 Label 只创建一次，复用时切换
+            self.image_slot = BoxLayout(size_hint_x=0.3)
+            self.img = CardImage(allow_stretch=True, keep_ratio=True)
+            self.img.bind(on_press=self.open_full_image)
+            self.img_placeholder = Label(text='No Image', font_name='Roboto')
+            self.image_slot.add_widget(self.img_placeholder)
+            self.add_widget(self.image_slot)
+            
+            # 信息区域
+            info_layout = BoxLayout(orientation='vertical', size_hint_x=0.5)
+            
+            self.title_label = Label(
+                size_hint_y=0.4,
+                halign='left',
+                valign='middle',
+                shorten=True,
+                font_name='Roboto'
+            )
+            self.title_label.bind(size=self.title_label.setter('text_size'))
+            
+            self.time_label = Label(
+                size_hint_y=0.3,
+                halign='left',
+                valign='middle',
+                font_name='Roboto'
+            )
+            self.time_label.bind(size=self.time_label.setter('text_size'))
+            
+            self.id_label = Label(
+                size_hint_y=0.3,
+                halign='left',
+                valign='middle',
+                font_name='Roboto'
+            )
+            self.id_label.bind(size=self.id_label.setter('text_size'))
+            
+            info_layout.add_widget(self.title_label)
+            info_layout.add_widget(self.time_label)
+            info_layout.add_widget(self.id_label)
+            self.add_widget(info_layout)
+            
+            # 编辑 / 删除按钮
+            btn_layout = BoxLayout(orientation='vertical', size_hint_x=0.2, spacing=5)
+            
+            edit_btn = Button(
+                text='Edit',
+                font_name='Roboto'
+            )
+            edit_btn.bind(on_press=self.edit_details)
+            
+            delete_btn = Button(
+                text='Delete',
+                background_color=(1, 0.3, 0.3, 1),
+                font_name='Roboto'
+            )
+            delete_btn.bind(on_press=self.confirm_delete)
+            
+            btn_layout.add_widget(edit_btn)
+            btn_layout.add_widget(delete_btn)
+            self.add_widget(btn_layout)
+    
+    def refresh_view_attrs(self, rv, index, data):
+        """RecycleView 复用卡片时更新显示内容"""
+        with profiler.span('card_bind'):
+            self.index = index
+            result = super().refresh_view_attrs(rv, index, data)
+            
+            title_text = self.title or 'Untitled'
+            if self.tags_text:
+                title_text += f"  {self.tags_text}"
+            self.title_label.text = title_text
+            self.time_label.text = f"Time: {self.timestamp or 'N/A'}"
+            item_id = self.item_id or 'unknown'
+            id_text = f"ID: {item_id[:8] if len(item_id) >= 8 else item_id}"
+            if self.item_id in App.get_running_app().near_duplicates:
+                id_text += '  (near duplicate)'
+            self.id_label.text = id_text
+            self.update_select_box()
+            self.update_image()
+            return result
+    
+    def update_select_box(self):
+        """按应用的多选状态显示勾选框"""
+        app = App.get_running_app()
+        if app.select_mode:
+            self.select_box.width = dp(40)
+            self.select_box.opacity = 1
+            self.select_box.active = self.item_id in app.selected_ids
+        else:
+            self.select_box.width = 0
+            self.select_box.opacity = 0
+            self.select_box.active = False
+    
+    def on_select_toggled(self, instance):
+        """勾选 / 取消勾选"""
+        App.get_running_app().set_selected(self.item_id, self.select_box.active)
+    
+    def update_image(self):
+        """更新图片区域：优先使用共享纹理缓存，未命中时异步请求缩略图，原图只在点击时解码"""
         try:
-            image_path = item_data['image_path']
-            Logger.info(f"ItemCard: Loading image from: {image_path}")
-            
-            if os.path.exists(image_path):
-                img = Image(
-                    source=image_path,
-                    size_hint_x=0.3,
-                    allow_stretch=True,
-                    keep_ratio=True
-                )
-                Logger.info(f"ItemCard: Image loaded successfully")
+            image_path = self.image_path
+            app = App.get_running_app()
+            if image_path in app.missing_images:
+                self.img.texture = None
+                self.img_placeholder.text = 'Missing'
+                self.show_image_widget(self.img_placeholder)
+            elif image_path:
+                texture = app.texture_cache.get(image_path)
+                if texture is not None:
+                    self.img.texture = texture
+                    self.show_image_widget(self.img)
+                    return
+                # 先释放旧纹理的引用，复用的卡片不会拖住上一张图
+                self.img.texture = None
+                self.img_placeholder.text = 'Loading...'
+                self.show_image_widget(self.img_placeholder)
+                app.thumbnail_cache.request(image_path, self.on_thumbnail)
             else:
-                Logger.warning(f"ItemCard: Image file not found: {image_path}")
-                img = Label(text='No Image', size_hint_x=0.3, font_name='Roboto')
+                self.img_placeholder.text = 'No Image'
+                self.show_image_widget(self.img_placeholder)
         except Exception as e:
             Logger.error(f"ItemCard: Failed to load image: {e}")
-            img = Label(text='Error', size_hint_x=0.3, font_name='Roboto')
-        
-        self.add_widget(img)
-        
-        # 信息区域
-        info_layout = BoxLayout(orientation='vertical', size_hint_x=0.5)
-        
-        time_text = item_data.get('timestamp', 'N/A')
-        time_label = Label(
-            text=f"Time: {time_text}",
-            size_hint_y=0.5,
-            halign='left',
-            valign='middle',
-            font_name='Roboto'
-        )
-        time_label.bind(size=time_label.setter('text_size'))
-        
-        item_id = item_data.get('id', 'unknown')
-        id_label = Label(
-            text=f"ID: {item_id[:8] if len(item_id) >= 8 else item_id}", 
-            size_hint_y=0.5,
-            halign='left',
-            valign='middle',
-            font_name='Roboto'
-        )
-        id_label.bind(size=id_label.setter('text_size'))
-        
-        info_layout.add_widget(time_label)
-        info_layout.add_widget(id_label)
-        self.add_widget(info_layout)
-        
-        # 删除按钮
-        delete_btn = Button(
-            text='Delete',
-            size_hint_x=0.2,
-            background_color=(1, 0.3, 0.3, 1),
-            font_name='Roboto'
-        )
-        delete_btn.bind(on_press=self.confirm_delete)
-        self.add_widget(delete_btn)
+            self.img_placeholder.text = 'Error'
+            self.show_image_widget(self.img_placeholder)
+    
+    def on_thumbnail(self, source_path, thumb_path):
+        """缩略图就绪回调"""
+        # 卡片可能已被复用到其他记录
+        if source_path != self.image_path:
+            return
+        if thumb_path:
+            try:
+                texture = App.get_running_app().texture_cache.load(source_path, thumb_path)
+            except Exception as e:
+                Logger.error(f"ItemCard: Failed to load thumbnail: {e}")
+                self.img_placeholder.text = 'Error'
+                self.show_image_widget(self.img_placeholder)
+                return
+            self.img.texture = texture
+            self.show_image_widget(self.img)
+        else:
+            self.img_placeholder.text = 'No Image'
+            self.show_image_widget(self.img_placeholder)
+    
+    def open_full_image(self, instance):
+        """查看原图"""
+        App.get_running_app().show_image(self.image_path, self.item_id)
+    
+    def edit_details(self, instance):
+        """编辑标题和标签"""
+        App.get_running_app().show_edit_dialog(self.item_id)
+    
+    def show_image_widget(self, widget):
+        """在图片区域中切换 Image / 占位 Label"""
+        if widget.parent is not self.image_slot:
+            self.image_slot.clear_widgets()
+            self.image_slot.add_widget(widget)
     
     def confirm_delete(self, instance):
         """确认删除对话框"""
@@ -168,7 +293,7 @@ class ItemCard(BoxLayout):
         """执行删除"""
         try:
             popup.dismiss()
-            self.delete_callback(self.item_data['id'])
+            App.get_running_app().delete_item(self.item_id)
         except Exception as e:
             Logger.error(f"ItemCard: Failed to delete item: {e}")
 
@@ -176,11 +301,89 @@ class ItemCard(BoxLayout):
 class ItemTrackerApp(App):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.startup = StartupTimer(STARTUP_STARTED_AT)
+        self.startup.mark('imports')
         self.data_file = None
+        self.store = None
+        # 延迟合并写入：窗口内的变更合并为一次写入
+        self.persistence = None
+        self.persist_delay = 1.0
+        # 切到后台时等待写入落盘的上限（秒）；Android 在 onPause 中阻塞约 5 秒会报 ANR
+        self.pause_flush_timeout = 2.0
+        # 所有存储 I/O 在该执行器的工作线程中串行执行
+        self.io = IOExecutor(on_pending_changed=self.on_io_pending_changed)
+        # 照片导入（解码 / 缩放 / 编码）较慢，使用单独的线程，不阻塞存储写入
+        self.image_io = IOExecutor(name='ImageWorker')
+        # 备份归档的导出 / 导入可能持续数分钟，使用单独的线程
+        self.archive_io = IOExecutor(name='ArchiveWorker')
+        # 进行中的导出 / 导入任务（同时只有一个）
+        self.archive_task = None
+        self.archive_progress = None
+        # 缩小导出时图片的最大边长、JPEG 质量和并行编码的线程数
+        self.archive_max_dimension = 1600
+        self.archive_quality = 80
+        self.archive_workers = 2
+        # 导入照片的最大边长和 JPEG 质量
+        self.photo_max_dimension = 2048
+        self.photo_quality = 85
+        # 等待相机写完照片的最长时间（秒）
+        self.photo_ready_timeout = 10.0
+        # 相机返回结果的时间，用于统计拍照到卡片显示的延迟
+        self.capture_result_at = None
+        # 存储后端：'journal'（默认）或 'sqlite'
+        self.storage_backend = os.environ.get('ITEM_TRACKER_STORAGE', 'journal')
         self.images_dir = None
-        self.items = []
+        self.thumbnails_dir = None
+        self.thumbnail_cache = None
+        # 卡片缩略图纹理缓存（字节预算，LRU 淘汰）
+        self.texture_cache = TextureCache(max_bytes=24 * 1024 * 1024)
+        self.content_store = None
+        # 图片文件对账：回收孤儿文件；图片缺失的记录路径缓存在 missing_images 中，
+        # 渲染卡片时直接查集合，不访问文件系统
+        self.storage_gc = None
+        self.gc_reclaim = True
+        self.missing_images = set()
+        self.items = ItemCollection()
+        # 列表每页条数，滚动到底部附近时追加下一页
+        self.page_size = 30
         self.current_photo_path = None
         self._activity_result_listener = None
+        # 进行中的加载编号，加载完成后为 None（用于丢弃过期的第一页预览）
+        self.pending_load = None
+        self.load_count = 0
+        # 每类列表操作最近一次新建的控件数
+        self.widget_stats = {}
+        # 多选删除状态
+        self.select_mode = False
+        self.selected_ids = set()
+        # 感知哈希索引：相似照片检索与近似重复标记
+        self.similarity = SimilarityIndex()
+        # 近似重复的记录 id，在增删 / 回填哈希时维护，卡片渲染时只查集合
+        self.near_duplicates = self.similarity.near_duplicates
+        # 旧记录回填感知哈希时每批的图片数
+        self.dhash_backfill_batch = 256
+        # 过滤视图（如相似照片）中显示的记录，None 表示显示全部
+        self.view_filter = None
+        self.filter_title = ''
+        # 过滤结果是否按时间排序（相似照片按距离排序，不分组）
+        self.view_filter_ordered = True
+        # 过滤结果的分组计数（按需计算）
+        self._filter_bucket_counts = None
+        # 日期分组：None / 'day' / 'month'
+        self.group_by = None
+        # 列表中已加载的记录条数（不含分组标题）
+        self.loaded_count = 0
+        # 标题 / 标签检索索引；编辑后延迟保存，连续修改只写一次
+        self.search_index = None
+        self._save_search_trigger = Clock.create_trigger(self.save_search_index, 2)
+        self._search_trigger = Clock.create_trigger(self.run_search, 0.2)
+        # 性能计时：ITEM_TRACKER_PROFILE=1 记录计时区间并在退出时导出 trace，
+        # =overlay 时另外显示性能浮层（点击浮层立即导出）
+        profile_mode = os.environ.get('ITEM_TRACKER_PROFILE', '')
+        profiler.enabled = profile_mode in ('1', 'overlay')
+        self.show_perf_overlay = profile_mode == 'overlay'
+        self.perf_overlay = None
+        self.startup.mark('app_init')
         Logger.info("App: ItemTrackerApp initialized")
     
     def build(self):
@@ -188,7 +391,12 @@ class ItemTrackerApp(App):
         try:
             Logger.info("App: Building UI")
             self.setup_storage()
-            self.load_data()
+            self.startup.mark('storage')
+            
+            # 中文字体（路径已缓存时只检查一个文件）
+            if platform == 'android':
+                register_chinese_font(os.path.join(self.data_dir, 'font_cache.json'))
+            self.startup.mark('font')
             
             # 设置 Activity 结果监听器
             if platform == 'android':
@@ -217,25 +425,147 @@ class ItemTrackerApp(App):
             )
             refresh_btn.bind(on_press=self.refresh_list)
             
+            self.select_btn = Button(
+                text='Select',
+                size_hint_x=0.3,
+                font_size='18sp',
+                font_name='Roboto'
+            )
+            self.select_btn.bind(on_press=self.toggle_select_mode)
+            
+            backup_btn = Button(
+                text='Backup',
+                size_hint_x=0.3,
+                font_size='18sp',
+                font_name='Roboto'
+            )
+            backup_btn.bind(on_press=self.show_backup_dialog)
+            
+            # 多选模式下才显示
+            self.bulk_delete_btn = Button(
+                text='Delete (0)',
+                size_hint_x=0,
+                opacity=0,
+                disabled=True,
+                background_color=(1, 0.3, 0.3, 1),
+                font_size='18sp',
+                font_name='Roboto'
+            )
+            self.bulk_delete_btn.bind(on_press=self.confirm_bulk_delete)
+            
+            # I/O 进行中提示
+            self.status_label = Label(
+                text='',
+                size_hint_x=0.2,
+                font_name='Roboto'
+            )
+            
             top_layout.add_widget(camera_btn)
             top_layout.add_widget(refresh_btn)
+            top_layout.add_widget(self.select_btn)
+            top_layout.add_widget(self.bulk_delete_btn)
+            top_layout.add_widget(backup_btn)
+            top_layout.add_widget(self.status_label)
             
             main_layout.add_widget(top_layout)
             
-            # 物品列表
-            self.scroll_view = ScrollView(size_hint=(1, 0.9))
-            self.items_layout = GridLayout(
-                cols=1,
-                spacing=10,
+            # 检索栏、分组和日期筛选
+            search_layout = BoxLayout(size_hint_y=None, height=dp(44), spacing=5)
+            self.search_input = TextInput(
+                hint_text='Search title / tags',
+                multiline=False,
+                padding=(10, 10),
+                font_name='Roboto'
+            )
+            self.search_input.bind(text=lambda instance, text: self._search_trigger())
+            
+            self.group_btn = Button(
+                text='Group: Off',
+                size_hint_x=0.3,
+                font_name='Roboto'
+            )
+            self.group_btn.bind(on_press=self.cycle_grouping)
+            
+            dates_btn = Button(
+                text='Dates',
+                size_hint_x=0.2,
+                font_name='Roboto'
+            )
+            dates_btn.bind(on_press=self.show_date_filter)
+            
+            search_layout.add_widget(self.search_input)
+            search_layout.add_widget(self.group_btn)
+            search_layout.add_widget(dates_btn)
+            main_layout.add_widget(search_layout)
+            
+            # 过滤提示栏（过滤视图中才显示）
+            self.filter_bar = BoxLayout(
+                size_hint_y=None,
+                height=0,
+                opacity=0,
+                disabled=True,
+                padding=(10, 0),
+                spacing=10
+            )
+            self.filter_label = Label(
+                text='',
+                halign='left',
+                valign='middle',
+                font_name='Roboto'
+            )
+            self.filter_label.bind(size=self.filter_label.setter('text_size'))
+            clear_filter_btn = Button(
+                text='Show All',
+                size_hint_x=0.3,
+                font_name='Roboto'
+            )
+            clear_filter_btn.bind(on_press=self.clear_view_filter)
+            self.filter_bar.add_widget(self.filter_label)
+            self.filter_bar.add_widget(clear_filter_btn)
+            main_layout.add_widget(self.filter_bar)
+            
+            # 空列表 / 加载中提示（有数据时隐藏）
+            self.empty_label = Label(
+                text='Loading...',
+                size_hint_y=None,
+                height=100,
+                halign='center',
+                valign='middle',
+                font_name='Roboto'
+            )
+            self.empty_label.bind(size=self.empty_label.setter('text_size'))
+            main_layout.add_widget(self.empty_label)
+            
+            # 物品列表：RecycleView 只创建可见数量的卡片并在滚动时复用
+            self.items_view = RecycleView(size_hint=(1, 0.9))
+            self.items_layout = RecycleBoxLayout(
+                viewclass=ItemCard,
+                key_viewclass='viewclass',
+                orientation='vertical',
+                default_size=(None, dp(150)),
+                default_size_hint=(1, None),
                 size_hint_y=None,
+                spacing=10,
                 padding=10
             )
             self.items_layout.bind(minimum_height=self.items_layout.setter('height'))
+            self.items_view.bind(scroll_y=self.on_list_scroll)
             
-            self.scroll_view.add_widget(self.items_layout)
-            main_layout.add_widget(self.scroll_view)
+            self.items_view.add_widget(self.items_layout)
+            main_layout.add_widget(self.items_view)
             
-            self.display_items()
+            if self.show_perf_overlay:
+                from perf_overlay import PerfOverlay
+                self.perf_overlay = PerfOverlay(
+                    profiler,
+                    texture_cache=self.texture_cache,
+                    on_export=self.export_trace
+                )
+                self.perf_overlay.show()
+            
+            # 先显示界面，下一帧再加载数据
+            Clock.schedule_once(self.load_initial_items, 0)
+            self.startup.mark('build_ui')
             
             Logger.info("App: UI built successfully")
             return main_layout
@@ -262,7 +592,7 @@ class ItemTrackerApp(App):
             
             if platform == 'android':
                 try:
-                    context = PythonActivity.mActivity
+                    context = java_class('PythonActivity').mActivity
                     
                     # 使用应用专属的外部文件目录
                     files_dir = context.getExternalFilesDir(None)
@@ -279,16 +609,42 @@ class ItemTrackerApp(App):
                     from android.storage import app_storage_path
                     self.data_dir = app_storage_path()
             else:
-                self.data_dir = os.path.dirname(os.path.abspath(__file__))
+                # ITEM_TRACKER_DATA_DIR 可指定桌面上的数据目录（基准测试使用临时目录）
+                default_dir = os.path.dirname(os.path.abspath(__file__))
+                self.data_dir = os.environ.get('ITEM_TRACKER_DATA_DIR') or default_dir
             
             if not os.path.exists(self.data_dir):
                 os.makedirs(self.data_dir)
             
             self.data_file = os.path.join(self.data_dir, 'items_data.json')
+            # 记录中的图片路径相对数据目录保存
+            ItemRecord.set_base_dir(self.data_dir)
+            self.store = open_store(self.data_file, self.storage_backend)
+            self.persistence = WriteBehind(
+                self.store,
+                self.io,
+                get_items=lambda: list(self.items),
+                delay=self.persist_delay,
+                on_flushed=self.compact_if_needed
+            )
+            Logger.info(f"App: Storage backend: {self.storage_backend}")
             self.images_dir = self.data_dir
+            self.thumbnails_dir = os.path.join(self.data_dir, 'thumbnails')
+            self.thumbnail_cache = ThumbnailCache(self.thumbnails_dir)
+            # 照片按内容哈希存放，相同照片只保存一份
+            self.content_store = ContentStore(os.path.join(self.data_dir, 'images'))
+            # 加载时跳过了损坏的记录后暂停回收，标记文件放在数据目录中，重启后仍然有效
+            self.storage_gc = StorageReconciler(
+                self.data_dir,
+                self.content_store,
+                self.thumbnail_cache,
+                hold_file=os.path.splitext(self.data_file)[0] + '.gc-hold'
+            )
+            self.search_index = SearchIndex(os.path.splitext(self.data_file)[0] + '.search.json')
             
             Logger.info(f"App: Data file: {self.data_file}")
             Logger.info(f"App: Images dir: {self.images_dir}")
+            Logger.info(f"App: Thumbnails dir: {self.thumbnails_dir}")
             
         except Exception as e:
             Logger.error(f"App: Storage setup failed: {e}")
@@ -312,7 +668,9 @@ class ItemTrackerApp(App):
                     self.callback(requestCode, resultCode, intent)
             
             self._activity_result_listener = ActivityResultListener(self.on_activity_result)
-            PythonActivity.mActivity.registerActivityResultListener(self._activity_result_listener)
+            java_class('PythonActivity').mActivity.registerActivityResultListener(
+                self._activity_result_listener
+            )
             Logger.info("App: Activity result listener registered")
             
         except Exception as e:
@@ -329,8 +687,9 @@ class ItemTrackerApp(App):
                 RESULT_OK = -1
                 if result_code == RESULT_OK:
                     Logger.info("App: Camera result OK")
-                    # 延迟处理，等待文件写入
-                    Clock.schedule_once(lambda dt: self.process_camera_result(), 0.5)
+                    self.capture_result_at = time.monotonic()
+                    # 回到主线程处理，文件就绪由 FileReadyWatcher 检测
+                    Clock.schedule_once(lambda dt: self.process_camera_result())
                 else:
                     Logger.warning(f"App: Camera cancelled or failed: {result_code}")
                     self.show_message('Cancelled', 'Photo was cancelled')
@@ -342,7 +701,7 @@ class ItemTrackerApp(App):
             traceback.print_exc()
     
     def process_camera_result(self):
-        """处理相机拍照结果"""
+        """处理相机拍照结果：等待照片文件写完（在后台线程中检测）"""
         try:
             if not self.current_photo_path:
                 Logger.warning("App: No photo path set")
@@ -350,34 +709,14 @@ class ItemTrackerApp(App):
             
             Logger.info(f"App: Processing camera result: {self.current_photo_path}")
             
-            if os.path.exists(self.current_photo_path):
-                file_size = os.path.getsize(self.current_photo_path)
-                Logger.info(f"App: Photo file size: {file_size} bytes")
-                
-                if file_size > 0:
-                    # 保存记录
-                    item_id = datetime.now().strftime('%Y%m%d%H%M%S%f')
-                    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    
-                    item = {
-                        'id': item_id,
-                        'image_path': self.current_photo_path,
-                        'timestamp': timestamp
-                    }
-                    
-                    self.items.append(item)
-                    self.save_data()
-                    self.display_items()
-                    self.show_message('Success', 'Item recorded!')
-                    Logger.info(f"App: Item saved: {item_id}")
-                else:
-                    Logger.warning("App: Photo file is empty")
-                    self.show_message('Error', 'Photo file is empty')
-            else:
-                Logger.warning(f"App: Photo file not found: {self.current_photo_path}")
-                self.show_message('Error', 'Photo file not found')
-            
+            photo_path = self.current_photo_path
             self.current_photo_path = None
+            FileReadyWatcher(
+                photo_path,
+                on_ready=lambda size: self.on_photo_checked(photo_path, size),
+                on_timeout=lambda size: self.on_photo_timeout(photo_path, size),
+                timeout=self.photo_ready_timeout
+            ).start()
             
         except Exception as e:
             Logger.error(f"App: Process camera result failed: {e}")
@@ -385,6 +724,97 @@ class ItemTrackerApp(App):
             traceback.print_exc()
             self.show_message('Error', f'Save failed:\n{str(e)}')
     
+    def on_photo_timeout(self, photo_path, last_size):
+        """等待超时：文件不存在或仍在写入，不导入（残留的半个文件由存储对账回收）"""
+        self.capture_result_at = None
+        if last_size is None:
+            Logger.warning(f"App: Photo file not found: {photo_path}")
+            self.show_message('Error', 'Photo file not found')
+            return
+        Logger.warning(f"App: Photo still being written after timeout ({last_size} bytes): {photo_path}")
+        self.show_message('Error', 'Photo was not saved in time.\nPlease take it again.')
+    
+    def on_photo_checked(self, photo_path, file_size):
+        """照片文件检查完成"""
+        if file_size is None:
+            Logger.warning(f"App: Photo file not found: {photo_path}")
+            self.show_message('Error', 'Photo file not found')
+            return
+        
+        Logger.info(f"App: Photo file size: {file_size} bytes")
+        if file_size > 0:
+            # 保存记录
+            item_id = datetime.now().strftime('%Y%m%d%H%M%S%f')
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            
+            item = {
+                'id': item_id,
+                'image_path': photo_path,
+                'timestamp': timestamp,
+                'captured_at': self.items.next_capture_time()
+            }
+            
+            def on_imported(item):
+                self.add_item(item)
+                self.log_capture_latency()
+                self.show_message('Success', 'Item recorded!')
+                Logger.info(f"App: Item saved: {item_id}")
+            
+            self.import_capture(item, on_imported)
+        else:
+            Logger.warning("App: Photo file is empty")
+            self.show_message('Error', 'Photo file is empty')
+    
+    def log_capture_latency(self):
+        """记录从相机返回到卡片插入列表的耗时"""
+        if self.capture_result_at is not None:
+            latency = (time.monotonic() - self.capture_result_at) * 1000.0
+            profiler.record('capture_to_card', latency)
+            Logger.info(f"App: Capture-to-card latency: {latency:.0f} ms")
+            self.capture_result_at = None
+    
+    def import_capture(self, item, on_imported):
+        """在图片线程中规范化照片并按内容哈希入库，完成后回调 on_imported(item)"""
+        def on_done(info):
+            item.update(info)
+            on_imported(item)
+        
+        def on_error(e):
+            # 入库失败时保留原文件，照常记录
+            Logger.error(f"App: Photo store failed, keeping original: {e}")
+            on_imported(item)
+        
+        self.image_io.submit(
+            self.process_photo_file,
+            item['image_path'],
+            on_done=on_done,
+            on_error=on_error
+        )
+    
+    def process_photo_file(self, photo_path):
+        """规范化照片并移入内容存储（在图片线程中执行），返回需要写入记录的字段"""
+        info = {}
+        try:
+            with profiler.span('photo_import'):
+                result = import_photo(photo_path, self.photo_max_dimension, self.photo_quality)
+            info['original_size'] = result['original_size']
+            info['stored_size'] = result['stored_size']
+        except Exception as e:
+            Logger.error(f"App: Photo import failed, keeping original: {e}")
+        
+        digest, stored_path, duplicate = self.content_store.put(photo_path)
+        info['image_hash'] = digest
+        info['image_path'] = stored_path
+        if duplicate:
+            Logger.info(f"App: Photo {digest[:12]} already stored, sharing the file")
+        
+        try:
+            with profiler.span('dhash'):
+                info['dhash'] = dhash(stored_path)
+        except Exception as e:
+            Logger.error(f"App: Perceptual hash failed: {e}")
+        return info
+    
     def take_photo(self, instance):
         """拍照功能"""
         try:
@@ -402,6 +832,18 @@ class ItemTrackerApp(App):
             self.show_message('Error', f'Photo function error:\n{str(e)}')
     
     def take_photo_android(self):
+        """Android 拍照：先确认相机权限，授权后再启动相机 Intent"""
+        ensure_permissions(self.on_camera_permission)
+    
+    def on_camera_permission(self, granted):
+        """相机权限的结果（主线程），未授权时不启动相机"""
+        if granted:
+            self.start_camera_intent()
+        else:
+            Logger.warning("App: Camera permission denied")
+            self.show_message('Error', 'Camera permission is required\nto take photos.')
+    
+    def start_camera_intent(self):
         """Android 拍照 - 使用 Intent"""
         try:
             Logger.info("App: Starting Android camera with Intent")
@@ -414,6 +856,9 @@ class ItemTrackerApp(App):
             Logger.info(f"App: Photo will be saved to: {self.current_photo_path}")
             
             # 创建相机 Intent（不指定输出路径，使用默认）
+            Intent = java_class('Intent')
+            MediaStore = java_class('MediaStore')
+            PythonActivity = java_class('PythonActivity')
             camera_intent = Intent(MediaStore.ACTION_IMAGE_CAPTURE)
             
             # 检查是否有相机应用
@@ -444,25 +889,27 @@ class ItemTrackerApp(App):
             
             filepath = os.path.join(self.images_dir, f'item_{item_id}.jpg')
             
-            try:
-                from PIL import Image as PILImage
-                img = PILImage.new('RGB', (300, 300), color=(73, 109, 137))
-                img.save(filepath)
-            except:
-                with open(filepath, 'wb') as f:
-                    f.write(b'\xff\xd8\xff\xe0')
-            
             item = {
                 'id': item_id,
                 'image_path': filepath,
-                'timestamp': timestamp
+                'timestamp': timestamp,
+                'captured_at': self.items.next_capture_time()
             }
             
-            self.items.append(item)
-            self.save_data()
-            self.display_items()
-            self.show_message('Success', 'Test item added!')
-            Logger.info(f"App: Test item created: {item_id}")
+            def on_imported(item):
+                self.add_item(item)
+                self.show_message('Success', 'Test item added!')
+                Logger.info(f"App: Test item created: {item_id}")
+            
+            def on_done(result):
+                self.import_capture(item, on_imported)
+            
+            self.io.submit(
+                write_test_image,
+                filepath,
+                on_done=on_done,
+                on_error=lambda e: self.show_message('Error', f'Add failed:\n{str(e)}')
+            )
             
         except Exception as e:
             Logger.error(f"App: Create test item failed: {e}")
@@ -470,64 +917,333 @@ class ItemTrackerApp(App):
             traceback.print_exc()
             self.show_message('Error', f'Add failed:\n{str(e)}')
     
+    def load_initial_items(self, dt):
+        """首帧之后加载数据并显示第一页"""
+        self.startup.mark('first_frame')
+        self.load_data(on_loaded=self.report_startup)
+    
+    def report_startup(self):
+        """数据加载完成后输出冷启动耗时报告"""
+        self.startup.mark('data_loaded')
+        self.io.submit(
+            self.startup.report,
+            os.path.join(self.data_dir, 'startup_times.jsonl'),
+            platform
+        )
+    
     def display_items(self):
-        """显示物品列表"""
+        """显示物品列表第一页（重建列表，只在启动和刷新时使用）"""
+        try:
+            self.track_widget_cost('display_items')
+            
+            # 集合已按时间排序，只替换数据，RecycleView 复用已有卡片
+            with profiler.span('render'):
+                page = self.visible_items(self.page_size)
+                self.items_view.data = self.view_rows(page)
+                self.loaded_count = len(page)
+                self.items_view.scroll_y = 1
+                self.update_empty_state()
+                    
+        except Exception as e:
+            Logger.error(f"App: Display items failed: {e}")
+    
+    def load_next_page(self):
+        """追加下一页"""
+        try:
+            page = self.visible_items(self.page_size, offset=self.loaded_count)
+            if page:
+                with profiler.span('render_page'):
+                    self.items_view.data.extend(self.view_rows(page, self.last_loaded_bucket()))
+                    self.loaded_count += len(page)
+        except Exception as e:
+            Logger.error(f"App: Load next page failed: {e}")
+    
+    def on_list_scroll(self, instance, scroll_y):
+        """滚动到底部附近时加载下一页"""
+        if scroll_y <= 0.1 and self.loaded_count < self.visible_count():
+            self.load_next_page()
+    
+    def visible_items(self, limit, offset=0):
+        """当前视图（全部记录或过滤结果）中的一页记录"""
+        if self.view_filter is None:
+            return self.items.newest(limit, offset)
+        return self.view_filter[offset:offset + limit]
+    
+    def visible_count(self):
+        """当前视图中的记录数"""
+        if self.view_filter is None:
+            return len(self.items)
+        return len(self.view_filter)
+    
+    def set_view_filter(self, title, items, ordered=True):
+        """只显示给定的记录（按给定顺序），并显示过滤提示栏
+
+        ordered 表示记录按时间排序（最新在前），此时才按日期分组显示。
+        """
+        self.view_filter = list(items)
+        self.view_filter_ordered = ordered
+        self._filter_bucket_counts = None
+        self.filter_title = title
+        self.update_filter_bar()
+        self.display_items()
+    
+    def clear_view_filter(self, instance=None):
+        """恢复显示全部记录"""
+        if self.view_filter is None:
+            return
+        self.view_filter = None
+        self.update_filter_bar()
+        self.display_items()
+        # 清空检索框（会触发一次空检索，此时已无过滤）
+        if self.search_input.text:
+            self.search_input.text = ''
+    
+    def update_filter_bar(self):
+        """显示 / 隐藏过滤提示栏"""
+        if self.view_filter is None:
+            self.filter_bar.height = 0
+            self.filter_bar.opacity = 0
+            self.filter_bar.disabled = True
+        else:
+            self.filter_label.text = f'{self.filter_title} ({len(self.view_filter)})'
+            self.filter_bar.height = dp(40)
+            self.filter_bar.opacity = 1
+            self.filter_bar.disabled = False
+    
+    def reload_visible(self):
+        """按已加载条数重新生成列表数据（批量变更后只更新一次）"""
+        with profiler.span('render'):
+            items = self.visible_items(self.loaded_count)
+            self.items_view.data = self.view_rows(items)
+            self.loaded_count = len(items)
+            self.update_empty_state()
+    
+    def add_item(self, item):
+        """新增记录：写入集合、持久化并插入对应卡片"""
+        item = as_record(item)
+        position = self.items.add(item)
+        self.content_store.claim(item.get('image_hash'))
+        self.save_item(item)
+        self.similarity.add(item)
+        self.search_index.add(item)
+        self.mark_search_dirty()
+        self.insert_item_view(item, position)
+        # 与已显示的照片近似重复时刷新卡片上的标记
+        if item['id'] in self.near_duplicates:
+            self.items_view.refresh_from_data()
+    
+    def insert_item_view(self, item, position):
+        """在排序位置插入单张卡片"""
+        try:
+            # 过滤视图只显示过滤结果
+            if self.view_filter is not None:
+                return
+            self.track_widget_cost('insert')
+            # 列表数据与集合顺序一致，直接使用集合给出的位置；
+            # 落在未加载页中的记录等滚动到时再显示
+            if position > self.loaded_count:
+                return
+            self.loaded_count += 1
+            if self.active_grouping():
+                # 分组标题（及其计数）可能变化，重新生成已加载范围
+                self.reload_visible()
+                return
+            with profiler.span('render_insert'):
+                self.items_view.data.insert(position, self.item_view_data(item))
+            self.update_empty_state()
+        except Exception as e:
+            Logger.error(f"App: Insert item view failed: {e}")
+    
+    def remove_item_view(self, position):
+        """只移除对应位置的卡片"""
         try:
-            Logger.info(f"App: Displaying {len(self.items)} items")
-            self.items_layout.clear_widgets()
+            self.track_widget_cost('remove')
+            if not 0 <= position < self.loaded_count:
+                return
+            self.loaded_count -= 1
+            if self.active_grouping():
+                self.reload_visible()
+                return
+            del self.items_view.data[position]
+            self.update_empty_state()
+        except Exception as e:
+            Logger.error(f"App: Remove item view failed: {e}")
+    
+    def track_widget_cost(self, operation):
+        """统计一次列表操作新建的控件数
+
+        RecycleView 在下一帧才创建 / 复用卡片，因此等两帧后再读取计数。
+        """
+        cards_before = ItemCard.created_count
+        
+        def report(dt):
+            cards = ItemCard.created_count - cards_before
+            widgets = cards * ItemCard.widgets_per_card
+            self.widget_stats[operation] = widgets
+            profiler.count(f'{operation}_cards', cards)
+        
+        Clock.schedule_once(lambda dt: Clock.schedule_once(report, 0), 0)
+    
+    def item_view_data(self, item):
+        """物品记录 -> RecycleView 数据项"""
+        return {
+            'item_id': item.get('id', ''),
+            'image_path': item.get('image_path', ''),
+            'timestamp': item.get('timestamp', ''),
+            'title': item.get('title', ''),
+            'tags_text': ' '.join(f'#{tag}' for tag in item.get('tags', []))
+        }
+    
+    def active_grouping(self):
+        """当前列表实际使用的分组方式（非时间顺序的过滤结果不分组）"""
+        if self.view_filter is not None and not self.view_filter_ordered:
+            return None
+        return self.group_by
+    
+    def view_rows(self, items, previous=None, counts=None):
+        """一段连续的记录（最新在前）-> RecycleView 数据，分组时在每组第一条前插入标题
+
+        previous 为列表中已有的最后一条记录所在的分组；counts(分组键) 返回分组的记录数，
+        默认取当前视图的分组计数。
+        """
+        group_by = self.active_grouping()
+        if group_by is None:
+            return [self.item_view_data(item) for item in items]
+        if counts is None:
+            counts = self.bucket_counter(group_by)
+        rows = []
+        for item in items:
+            key = bucket_key(capture_time(item), group_by)
+            if key != previous:
+                rows.append({
+                    'viewclass': 'SectionHeader',
+                    'text': f'{key}  ({counts(key)})',
+                    'height': dp(32)
+                })
+                previous = key
+            rows.append(self.item_view_data(item))
+        return rows
+    
+    def bucket_counter(self, group_by):
+        """当前视图的 分组键 -> 记录数：全部记录直接查集合的分组索引，过滤结果按需统计一次"""
+        if self.view_filter is None:
+            return lambda key: self.items.bucket_count(key, group_by)
+        if self._filter_bucket_counts is None or self._filter_bucket_counts[0] != group_by:
+            counts = {}
+            for item in self.view_filter:
+                key = bucket_key(capture_time(item), group_by)
+                counts[key] = counts.get(key, 0) + 1
+            self._filter_bucket_counts = (group_by, counts)
+        counts = self._filter_bucket_counts[1]
+        return lambda key: counts.get(key, 0)
+    
+    def last_loaded_bucket(self):
+        """列表中最后一条已加载记录所在的分组，未分组或没有记录时为 None"""
+        group_by = self.active_grouping()
+        if group_by is None or not self.loaded_count:
+            return None
+        last = self.visible_items(1, offset=self.loaded_count - 1)
+        return bucket_key(capture_time(last[0]), group_by) if last else None
+    
+    def cycle_grouping(self, instance=None):
+        """切换分组方式：不分组 -> 按天 -> 按月"""
+        modes = [None, 'day', 'month']
+        self.group_by = modes[(modes.index(self.group_by) + 1) % len(modes)]
+        self.group_btn.text = f"Group: {(self.group_by or 'off').capitalize()}"
+        self.reload_visible()
+    
+    def filter_date_range(self, title, start, end):
+        """只显示拍摄时间在 [start, end) 内的记录（由时间索引二分得到）"""
+        items = self.items.range_items(start, end)
+        Logger.info(f"App: {title}: {len(items)} items")
+        self.set_view_filter(title, items)
+    
+    def show_date_filter(self, instance=None):
+        """日期筛选对话框：最近若干天，或按月份（附记录数）"""
+        try:
+            content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+            popup = Popup(
+                title='Filter by Date',
+                content=content,
+                size_hint=(0.9, 0.8)
+            )
             
-            if not self.items:
-                empty_label = Label(
-                    text='No records\nClick "Take Photo" to add items',
+            def choose(title, start, end):
+                popup.dismiss()
+                self.filter_date_range(title, start, end)
+            
+            today = time.mktime(datetime.now().date().timetuple())
+            recent_layout = BoxLayout(size_hint_y=None, height=dp(44), spacing=10)
+            for label, days in (('Today', 1), ('Last 7 days', 7), ('Last 30 days', 30)):
+                btn = Button(text=label, font_name='Roboto')
+                start = today - (days - 1) * 86400
+                btn.bind(on_press=lambda x, l=label, s=start: choose(l, s, float('inf')))
+                recent_layout.add_widget(btn)
+            content.add_widget(recent_layout)
+            
+            # 月份列表来自分组索引，不遍历记录
+            months_layout = GridLayout(cols=1, spacing=5, size_hint_y=None)
+            months_layout.bind(minimum_height=months_layout.setter('height'))
+            for key, count in self.items.buckets('month'):
+                btn = Button(
+                    text=f'{key}  ({count})',
                     size_hint_y=None,
-                    height=100,
-                    halign='center',
-                    valign='middle',
+                    height=dp(44),
                     font_name='Roboto'
                 )
-                empty_label.bind(size=empty_label.setter('text_size'))
-                self.items_layout.add_widget(empty_label)
-                return
+                start, end = bucket_range(key)
+                btn.bind(on_press=lambda x, k=key, s=start, e=end: choose(k, s, e))
+                months_layout.add_widget(btn)
+            scroll = ScrollView()
+            scroll.add_widget(months_layout)
+            content.add_widget(scroll)
             
-            sorted_items = sorted(
-                self.items,
-                key=lambda x: x.get('timestamp', ''),
-                reverse=True
+            close_btn = Button(
+                text='Close',
+                size_hint_y=None,
+                height=dp(44),
+                font_name='Roboto'
             )
+            close_btn.bind(on_press=popup.dismiss)
+            content.add_widget(close_btn)
             
-            for item in sorted_items:
-                try:
-                    card = ItemCard(item, self.delete_item)
-                    self.items_layout.add_widget(card)
-                except Exception as e:
-                    Logger.error(f"App: Failed to create card for item {item.get('id')}: {e}")
-                    
+            popup.open()
         except Exception as e:
-            Logger.error(f"App: Display items failed: {e}")
+            Logger.error(f"App: Failed to show date filter: {e}")
+    
+    def update_empty_state(self):
+        """根据是否有数据显示/隐藏空列表提示"""
+        if self.items_view.data:
+            self.empty_label.height = 0
+            self.empty_label.opacity = 0
+        elif self.view_filter is not None:
+            self.empty_label.text = 'No matching records'
+            self.empty_label.height = 100
+            self.empty_label.opacity = 1
+        else:
+            self.empty_label.text = 'No records\nClick "Take Photo" to add items'
+            self.empty_label.height = 100
+            self.empty_label.opacity = 1
     
     def delete_item(self, item_id):
         """删除物品"""
         try:
             Logger.info(f"App: Deleting item: {item_id}")
             
-            item_to_delete = None
-            for item in self.items:
-                if item.get('id') == item_id:
-                    item_to_delete = item
-                    break
+            item_to_delete = self.items.get(item_id)
             
             if item_to_delete:
-                image_path = item_to_delete.get('image_path')
-                if image_path and os.path.exists(image_path):
-                    try:
-                        os.remove(image_path)
-                        Logger.info(f"App: Deleted image: {image_path}")
-                    except Exception as e:
-                        Logger.error(f"App: Failed to delete image: {e}")
+                self.release_images([item_to_delete])
                 
-                self.items.remove(item_to_delete)
-                self.save_data()
-                self.display_items()
+                _, position = self.items.remove(item_id)
+                self.similarity.remove(item_id)
+                self.search_index.remove(item_id)
+                self.mark_search_dirty()
+                self.save_deletion(item_id)
+                if self.view_filter is not None:
+                    self.drop_from_view_filter({item_id})
+                else:
+                    self.remove_item_view(position)
                 self.show_message('Success', 'Item deleted!')
             else:
                 Logger.warning(f"App: Item not found: {item_id}")
@@ -536,41 +1252,825 @@ class ItemTrackerApp(App):
             Logger.error(f"App: Delete item failed: {e}")
             self.show_message('Error', f'Delete failed:\n{str(e)}')
     
+    def toggle_select_mode(self, instance=None):
+        """进入 / 退出多选模式"""
+        self.select_mode = not self.select_mode
+        self.selected_ids.clear()
+        self.select_btn.text = 'Cancel' if self.select_mode else 'Select'
+        self.bulk_delete_btn.size_hint_x = 0.3 if self.select_mode else 0
+        self.bulk_delete_btn.opacity = 1 if self.select_mode else 0
+        self.update_bulk_delete_btn()
+        # 只刷新可见卡片的勾选框
+        self.items_view.refresh_from_data()
+    
+    def set_selected(self, item_id, selected):
+        """记录卡片的勾选状态"""
+        if selected:
+            self.selected_ids.add(item_id)
+        else:
+            self.selected_ids.discard(item_id)
+        self.update_bulk_delete_btn()
+    
+    def update_bulk_delete_btn(self):
+        count = len(self.selected_ids)
+        self.bulk_delete_btn.text = f'Delete ({count})'
+        self.bulk_delete_btn.disabled = not (self.select_mode and count)
+    
+    def confirm_bulk_delete(self, instance):
+        """批量删除确认对话框"""
+        try:
+            count = len(self.selected_ids)
+            if not count:
+                return
+            
+            content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+            msg_label = Label(text=f'Delete {count} items?', font_name='Roboto')
+            content.add_widget(msg_label)
+            
+            btn_layout = BoxLayout(size_hint_y=0.3, spacing=10)
+            
+            popup = Popup(
+                title='Confirm Delete',
+                content=content,
+                size_hint=(0.8, 0.4),
+                auto_dismiss=False
+            )
+            
+            confirm_btn = Button(
+                text='Confirm',
+                background_color=(1, 0.3, 0.3, 1),
+                font_name='Roboto'
+            )
+            cancel_btn = Button(text='Cancel', font_name='Roboto')
+            
+            def on_confirm(x):
+                popup.dismiss()
+                self.delete_items(list(self.selected_ids))
+                self.toggle_select_mode()
+            
+            confirm_btn.bind(on_press=on_confirm)
+            cancel_btn.bind(on_press=popup.dismiss)
+            
+            btn_layout.add_widget(cancel_btn)
+            btn_layout.add_widget(confirm_btn)
+            content.add_widget(btn_layout)
+            
+            popup.open()
+        except Exception as e:
+            Logger.error(f"App: Failed to show bulk delete dialog: {e}")
+    
+    def delete_items(self, item_ids):
+        """批量删除：一次存储写入、后台批量删除图片、列表只更新一次"""
+        try:
+            Logger.info(f"App: Deleting {len(item_ids)} items")
+            
+            deleted_items = []
+            for item_id in item_ids:
+                item, _ = self.items.remove(item_id)
+                if item is not None:
+                    self.similarity.remove(item_id)
+                    self.search_index.remove(item_id)
+                    deleted_items.append(item)
+            
+            if not deleted_items:
+                return
+            self.mark_search_dirty()
+            
+            deleted_ids = [item['id'] for item in deleted_items]
+            self.persistence.delete_many(deleted_ids)
+            self.release_images(deleted_items)
+            
+            # 重新生成已加载范围内的列表数据
+            self.track_widget_cost('delete_items')
+            if self.view_filter is not None:
+                self.drop_from_view_filter(set(deleted_ids))
+            else:
+                self.reload_visible()
+            self.show_message('Success', f'{len(deleted_ids)} items deleted!')
+            
+        except Exception as e:
+            Logger.error(f"App: Delete items failed: {e}")
+            self.show_message('Error', f'Delete failed:\n{str(e)}')
+    
+    def drop_from_view_filter(self, item_ids):
+        """从过滤结果中移除已删除的记录并更新列表"""
+        self.view_filter = [item for item in self.view_filter if item.get('id') not in item_ids]
+        self._filter_bucket_counts = None
+        self.update_filter_bar()
+        self.reload_visible()
+    
+    def show_similar(self, item_id):
+        """只显示与给定记录相似的照片（按距离排序，自身在最前）"""
+        try:
+            item = self.items.get(item_id)
+            if item is None:
+                return
+            matches = self.similarity.similar(item_id)
+            similar_items = [item]
+            similar_items.extend(
+                self.items.get(key) for _, key in matches if key in self.items
+            )
+            Logger.info(f"App: {len(matches)} photos similar to {item_id}")
+            self.set_view_filter(
+                f"Similar to {item.get('timestamp', item_id)}", similar_items, ordered=False
+            )
+        except Exception as e:
+            Logger.error(f"App: Show similar failed: {e}")
+            self.show_message('Error', f'Search failed:\n{str(e)}')
+    
+    def run_search(self, *args):
+        """按检索框内容过滤列表（输入停顿后执行）"""
+        try:
+            query = self.search_input.text.strip()
+            if not query:
+                if self.view_filter is not None and self.filter_title.startswith('Search'):
+                    self.clear_view_filter()
+                return
+            
+            started = time.perf_counter()
+            item_ids = self.search_index.search(query)
+            results = self.items.ordered(item_ids or ())
+            elapsed = (time.perf_counter() - started) * 1000.0
+            Logger.info(f"App: Search '{query}' matched {len(results)} items in {elapsed:.1f} ms")
+            self.set_view_filter(f'Search "{query}"', results)
+        except Exception as e:
+            Logger.error(f"App: Search failed: {e}")
+    
+    def show_edit_dialog(self, item_id):
+        """编辑标题和标签的对话框"""
+        try:
+            item = self.items.get(item_id)
+            if item is None:
+                return
+            
+            content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+            title_input = TextInput(
+                text=item.get('title', ''),
+                hint_text='Title',
+                multiline=False,
+                font_name='Roboto'
+            )
+            tags_input = TextInput(
+                text=', '.join(item.get('tags', [])),
+                hint_text='Tags (comma separated)',
+                multiline=False,
+                font_name='Roboto'
+            )
+            content.add_widget(title_input)
+            content.add_widget(tags_input)
+            
+            btn_layout = BoxLayout(spacing=10)
+            
+            popup = Popup(
+                title='Edit Item',
+                content=content,
+                size_hint=(0.9, 0.45),
+                auto_dismiss=False
+            )
+            
+            def on_save(x):
+                popup.dismiss()
+                self.update_item_details(item_id, title_input.text, tags_input.text)
+            
+            save_btn = Button(
+                text='Save',
+                background_color=(0.3, 0.7, 0.3, 1),
+                font_name='Roboto'
+            )
+            cancel_btn = Button(text='Cancel', font_name='Roboto')
+            save_btn.bind(on_press=on_save)
+            cancel_btn.bind(on_press=popup.dismiss)
+            
+            btn_layout.add_widget(cancel_btn)
+            btn_layout.add_widget(save_btn)
+            content.add_widget(btn_layout)
+            
+            popup.open()
+        except Exception as e:
+            Logger.error(f"App: Show edit dialog failed: {e}")
+    
+    def update_item_details(self, item_id, title, tags_text):
+        """保存标题和标签：覆盖写入记录、更新检索索引和对应卡片"""
+        try:
+            item = self.items.get(item_id)
+            if item is None:
+                return
+            
+            item['title'] = title.strip()
+            item['tags'] = parse_tags(tags_text)
+            item['updated_at'] = time.time()
+            self.save_item(item)
+            self.search_index.add(item)
+            self.mark_search_dirty()
+            
+            data = self.items_view.data
+            for index, entry in enumerate(data):
+                if entry.get('item_id') == item_id:
+                    data[index] = self.item_view_data(item)
+                    break
+        except Exception as e:
+            Logger.error(f"App: Update item failed: {e}")
+            self.show_message('Error', f'Save failed:\n{str(e)}')
+    
+    def mark_search_dirty(self):
+        """检索索引有变更，稍后保存"""
+        self._save_search_trigger()
+    
+    def save_search_index(self, *args):
+        """在 I/O 线程中保存检索索引的变更（只追加变更过的记录，日志过长时改写快照）"""
+        data = self.search_index.pending_save()
+        if data is not None:
+            self.io.submit(self.search_index.save, data)
+    
+    def backfill_dhashes(self):
+        """为没有感知哈希的旧记录分批计算（图片线程），全部完成后保存一次"""
+        pending = [
+            item for item in self.items
+            if not item.get('dhash') and item.get('image_path')
+            and item.get('image_path') not in self.missing_images
+        ]
+        if not pending:
+            return
+        
+        batch_size = self.dhash_backfill_batch
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        remaining = [len(batches)]
+        updated = [0]
+        Logger.info(f"App: Backfilling perceptual hashes for {len(pending)} items")
+        
+        def on_batch_done(batch, hashes):
+            for item, value in zip(batch, hashes):
+                # 记录可能已被删除或在刷新后被替换
+                if value and self.items.get(item['id']) is item:
+                    item['dhash'] = value
+                    self.similarity.add(item)
+                    updated[0] += 1
+            finish_batch()
+        
+        def on_batch_error(e):
+            Logger.error(f"App: Perceptual hash backfill failed: {e}")
+            finish_batch()
+        
+        def finish_batch():
+            remaining[0] -= 1
+            if remaining[0] == 0 and updated[0]:
+                Logger.info(f"App: Backfilled {updated[0]} perceptual hashes")
+                self.save_data()
+                self.items_view.refresh_from_data()
+        
+        for batch in batches:
+            self.image_io.submit(
+                dhash_batch,
+                [item['image_path'] for item in batch],
+                on_done=lambda hashes, batch=batch: on_batch_done(batch, hashes),
+                on_error=on_batch_error
+            )
+    
+    def reconcile_storage(self, on_complete=None, ask_cleanup=False):
+        """在 I/O 线程中对账图片文件与记录：回收孤儿文件，标记图片缺失的记录
+
+        回收因记录损坏而暂停时只报告；ask_cleanup 为真且有孤儿文件时询问用户是否清理。
+        """
+        def on_done(report):
+            missing = report['missing']
+            # 只在缺失集合变化时提示和刷新卡片
+            if missing != self.missing_images:
+                self.missing_images = missing
+                if missing:
+                    Logger.warning(f"App: {len(missing)} records point at missing images")
+                self.items_view.refresh_from_data()
+            if report['held'] and report['orphans'] and ask_cleanup:
+                self.confirm_photo_cleanup(report['orphans'])
+            if on_complete:
+                on_complete()
+        
+        def on_error(e):
+            Logger.error(f"App: Storage reconciliation failed: {e}")
+            if on_complete:
+                on_complete()
+        
+        self.io.submit(
+            profiler.wrap('storage_gc', self.storage_gc.run),
+            list(self.items),
+            reclaim=self.gc_reclaim,
+            exclude=[self.current_photo_path],
+            on_done=on_done,
+            on_error=on_error
+        )
+    
+    def confirm_photo_cleanup(self, count):
+        """回收暂停期间询问是否删除没有记录引用的照片"""
+        try:
+            content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+            msg_label = Label(
+                text=f'{count} photos are not used by any record.\n'
+                     f'They were kept because some records could not be read.\nDelete them?',
+                halign='center',
+                valign='middle',
+                font_name='Roboto'
+            )
+            msg_label.bind(size=msg_label.setter('text_size'))
+            content.add_widget(msg_label)
+            
+            btn_layout = BoxLayout(size_hint_y=0.3, spacing=10)
+            
+            popup = Popup(
+                title='Unused Photos',
+                content=content,
+                size_hint=(0.8, 0.4),
+                auto_dismiss=False
+            )
+            
+            delete_btn = Button(
+                text='Delete',
+                background_color=(1, 0.3, 0.3, 1),
+                font_name='Roboto'
+            )
+            keep_btn = Button(text='Keep', font_name='Roboto')
+            
+            def on_delete(x):
+                popup.dismiss()
+                Logger.info(f"App: User confirmed removing {count} unused photos")
+                self.io.submit(self.storage_gc.release)
+                self.reconcile_storage()
+            
+            delete_btn.bind(on_press=on_delete)
+            keep_btn.bind(on_press=popup.dismiss)
+            
+            btn_layout.add_widget(keep_btn)
+            btn_layout.add_widget(delete_btn)
+            content.add_widget(btn_layout)
+            
+            popup.open()
+        except Exception as e:
+            Logger.error(f"App: Failed to show photo cleanup dialog: {e}")
+    
     def refresh_list(self, instance):
         """刷新列表"""
         try:
             Logger.info("App: Refreshing list")
-            self.load_data()
-            self.display_items()
-            self.show_message('Info', 'List refreshed!')
+            self.load_data(on_loaded=lambda: self.show_message('Info', 'List refreshed!'))
         except Exception as e:
             Logger.error(f"App: Refresh failed: {e}")
             self.show_message('Error', f'Refresh failed:\n{str(e)}')
     
-    def load_data(self):
-        """加载数据"""
-        try:
-            if os.path.exists(self.data_file):
-                Logger.info(f"App: Loading data from: {self.data_file}")
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    self.items = json.load(f)
-                Logger.info(f"App: Loaded {len(self.items)} items")
-            else:
-                Logger.info("App: No data file found, starting fresh")
-                self.items = []
-        except Exception as e:
+    def release_images(self, items):
+        """释放被删除记录对图片的引用，不再被引用的文件在一个后台任务中删除"""
+        to_remove = []
+        for item in items:
+            image_path = item.get('image_path')
+            if not image_path:
+                continue
+            digest = item.get('image_hash')
+            # 旧记录没有哈希，直接删除文件
+            if not digest or self.content_store.release(digest):
+                to_remove.append((image_path, digest))
+                self.texture_cache.discard(image_path)
+        if to_remove:
+            self.io.submit(self.remove_image_files, to_remove)
+    
+    def remove_image_files(self, entries):
+        """删除图片及其缩略图（在 I/O 线程中执行），entries 为 (路径, 哈希) 列表"""
+        if self.storage_gc.held:
+            # 跳过的损坏记录可能引用同一张照片；先保留，之后的对账会把它们算作孤儿报告
+            Logger.info(f"App: Keeping {len(entries)} images while reclaiming is paused")
+            return
+        for image_path, digest in entries:
+            try:
+                if digest:
+                    removed = self.content_store.remove_unreferenced(
+                        digest, image_path, before_remove=self.thumbnail_cache.discard
+                    )
+                elif os.path.exists(image_path):
+                    self.thumbnail_cache.discard(image_path)
+                    os.remove(image_path)
+                    removed = True
+                else:
+                    removed = False
+                if removed:
+                    Logger.info(f"App: Deleted image: {image_path}")
+            except Exception as e:
+                Logger.error(f"App: Failed to delete image: {e}")
+    
+    def load_data(self, on_loaded=None):
+        """加载数据（快照流式解析 + 日志重放，在 I/O 线程中执行），读到第一页时先显示预览"""
+        Logger.info(f"App: Loading data from: {self.data_file}")
+        # 先写入待写变更（I/O 线程串行执行，加载时能读到）
+        self.flush_pending_writes()
+        self.load_count += 1
+        load_id = self.pending_load = self.load_count
+        
+        def on_preview(items):
+            # 在 I/O 线程中调用
+            Clock.schedule_once(lambda dt: self.show_preview(items, load_id))
+        
+        def on_done(result):
+            self.pending_load = None
+            items, similarity = result
+            with profiler.span('load_index'):
+                self.items = ItemCollection(items)
+                self.content_store.rebuild(self.items)
+                self.similarity = similarity
+                self.near_duplicates = similarity.near_duplicates
+                if self.search_index.sync(self.items):
+                    self.mark_search_dirty()
+            Logger.info(f"App: Loaded {len(self.items)} items")
+            # 旧格式或有损坏条目的快照在加载后重写
+            self.compact_if_needed()
+            skipped = getattr(self.store, 'skipped_entries', 0)
+            corrupt = getattr(self.store, 'snapshot_corrupt', None)
+            if corrupt or skipped:
+                # 跳过的记录引用的照片看起来都是孤儿，先暂停回收（在对账之前执行）
+                reason = f'snapshot moved to {corrupt}' if corrupt else f'{skipped} damaged records skipped'
+                self.io.submit(self.storage_gc.hold, reason)
+            if corrupt:
+                self.show_message('Warning', f'The data file could not be read.\nIt was kept as {os.path.basename(corrupt)}.\nPhotos are kept.')
+            elif skipped:
+                self.show_message('Warning', f'{skipped} damaged records were skipped.\nThe original file and photos were kept.')
+            # 重新加载后过滤结果中的记录已失效
+            self.view_filter = None
+            self.update_filter_bar()
+            if self.search_input.text:
+                self.search_input.text = ''
+            self.display_items()
+            # 对账完成后再回填感知哈希，跳过图片缺失的记录
+            # 刚发现损坏时已经提示过，不再询问是否清理照片
+            self.reconcile_storage(
+                on_complete=self.backfill_dhashes,
+                ask_cleanup=not (corrupt or skipped)
+            )
+            if on_loaded:
+                on_loaded()
+        
+        def on_error(e):
+            # 读取失败时保留内存中已有的记录
+            self.pending_load = None
             Logger.error(f"App: Load data failed: {e}")
-            self.items = []
+            self.display_items()
+        
+        # 检索索引只在首次加载时读取，之后增量维护
+        if not self.search_index.loaded:
+            self.io.submit(self.search_index.load)
+        self.io.submit(
+            profiler.wrap('load', self.load_records),
+            preview_size=self.page_size,
+            on_preview=on_preview,
+            on_done=on_done,
+            on_error=on_error
+        )
+    
+    def load_records(self, preview_size, on_preview):
+        """读取全部记录并建立相似度索引（在 I/O 线程中执行），返回 (记录, 索引)
+
+        近似重复标记需要逐条查找，与读取一起放在后台完成，不占用主线程。
+        """
+        items = self.store.load(preview_size=preview_size, on_preview=on_preview)
+        with profiler.span('similarity_index'):
+            similarity = SimilarityIndex()
+            similarity.rebuild(items)
+        return items, similarity
+    
+    def show_preview(self, items, load_id):
+        """完整数据加载完成前先显示第一页（只读，加载完成后被完整列表替换）"""
+        if load_id != self.pending_load:
+            return
+        if not self.startup.reported:
+            self.startup.mark('first_page')
+        with profiler.span('render_preview'):
+            preview = ItemCollection(items)
+            page = preview.newest(self.page_size)
+            # 预览中的分组计数只含已读到的记录，不显示（完整加载后会整体替换）
+            self.items_view.data = self.view_rows(page, counts=lambda key: '...')
+            self.loaded_count = len(page)
+            self.update_empty_state()
+        Logger.info(f"App: Showing first {self.loaded_count} items while loading")
     
     def save_data(self):
-        """保存数据"""
+        """保存数据（将全部记录压缩为快照），与其他变更合并后写入"""
+        self.persistence.save_snapshot()
+    
+    def save_item(self, item):
+        """持久化单条新增 / 修改的记录"""
+        self.persistence.add(item)
+    
+    def save_deletion(self, item_id):
+        """持久化单条删除记录"""
+        self.persistence.delete(item_id)
+    
+    def flush_pending_writes(self):
+        """立即把已合并的变更交给 I/O 线程写入"""
+        if self.persistence is not None:
+            self.persistence.flush()
+    
+    def compact_if_needed(self):
+        """日志过长时压缩"""
+        if self.store.needs_compaction():
+            self.save_data()
+    
+    def on_io_pending_changed(self, pending):
+        """显示 / 隐藏 I/O 进行中状态"""
+        status_label = getattr(self, 'status_label', None)
+        if status_label is not None:
+            status_label.text = f'Saving ({pending})' if pending else ''
+    
+    def on_pause(self):
+        """切到后台前写入全部待写变更并等待落盘
+
+        暂停后系统可能直接结束进程，不再有回调，所以要确认写入已完成；等待有上限，
+        超时时写入在后台继续（I/O 线程按顺序执行，排在前面的任务也会先完成）。
+        """
+        self.flush_pending_writes()
+        if self.search_index is not None:
+            self.save_search_index()
+        if self.io.pending and not self.io.wait(self.pause_flush_timeout):
+            Logger.warning("App: Pending writes not confirmed before pause")
+        return True
+    
+    def on_stop(self):
+        """退出时写入待写变更、等待 I/O 完成并关闭存储"""
+        # 未完成的导出不保留；中断的导入在下次导入同一归档时跳过已导入的记录继续
+        if self.archive_task is not None:
+            self.archive_task.cancel()
+        self.archive_io.shutdown()
+        # 先等图片线程处理完并执行回调（导入完成的照片在回调中加入记录和待写变更），再写入
+        self.image_io.drain()
+        self.image_io.shutdown()
+        self.flush_pending_writes()
+        self.texture_cache.log_stats()
+        if self.persistence is not None:
+            self.persistence.log_stats()
+        if profiler.enabled:
+            profiler.log_summary()
+            self.export_trace()
+        if self.search_index is not None:
+            self.save_search_index()
+        if self.store:
+            self.io.submit(self.store.close)
+        self.io.shutdown()
+    
+    def exports_dir(self):
+        """备份归档所在目录（Android 上位于应用外部文件目录，可通过 USB 复制）"""
+        return os.path.join(self.data_dir, 'exports')
+    
+    def list_archives(self):
+        """备份目录中的归档，最新的在前"""
+        exports_dir = self.exports_dir()
+        if not os.path.isdir(exports_dir):
+            return []
+        names = [name for name in os.listdir(exports_dir) if name.endswith('.zip')]
+        return sorted(names, reverse=True)
+    
+    def show_backup_dialog(self, instance=None):
+        """备份对话框：导出全部记录，或从备份目录中的归档导入"""
+        try:
+            content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+            popup = Popup(
+                title='Backup',
+                content=content,
+                size_hint=(0.9, 0.8)
+            )
+            
+            export_layout = BoxLayout(size_hint_y=None, height=dp(44), spacing=10)
+            export_btn = Button(text='Export', font_name='Roboto')
+            export_btn.bind(on_press=lambda x: (popup.dismiss(), self.export_archive()))
+            smaller_btn = Button(text='Export (smaller)', font_name='Roboto')
+            smaller_btn.bind(on_press=lambda x: (popup.dismiss(), self.export_archive(smaller=True)))
+            export_layout.add_widget(export_btn)
+            export_layout.add_widget(smaller_btn)
+            content.add_widget(export_layout)
+            
+            archives_layout = GridLayout(cols=1, spacing=5, size_hint_y=None)
+            archives_layout.bind(minimum_height=archives_layout.setter('height'))
+            for name in self.list_archives():
+                btn = Button(
+                    text=f'Import {name}',
+                    size_hint_y=None,
+                    height=dp(44),
+                    font_name='Roboto'
+                )
+                path = os.path.join(self.exports_dir(), name)
+                btn.bind(on_press=lambda x, p=path: (popup.dismiss(), self.import_archive(p)))
+                archives_layout.add_widget(btn)
+            scroll = ScrollView()
+            scroll.add_widget(archives_layout)
+            content.add_widget(scroll)
+            
+            close_btn = Button(
+                text='Close',
+                size_hint_y=None,
+                height=dp(44),
+                font_name='Roboto'
+            )
+            close_btn.bind(on_press=popup.dismiss)
+            content.add_widget(close_btn)
+            
+            popup.open()
+        except Exception as e:
+            Logger.error(f"App: Failed to show backup dialog: {e}")
+    
+    def export_archive(self, smaller=False, path=None):
+        """在归档线程中把全部记录和图片导出为 zip（smaller 时图片并行缩小重新编码）"""
+        if self.archive_task is not None:
+            self.show_message('Info', 'A backup is already running')
+            return
+        if path is None:
+            name = datetime.now().strftime('items-%Y%m%d-%H%M%S.zip')
+            path = os.path.join(self.exports_dir(), name)
+        # zipfile / 线程池只在备份时用到，不放在启动路径上
+        from archive import ArchiveExporter
+        task = ArchiveExporter(
+            progress=self.on_archive_progress,
+            workers=self.archive_workers,
+            max_dimension=self.archive_max_dimension if smaller else None,
+            quality=self.archive_quality
+        )
+        self.start_archive_task(task, 'Exporting')
+        
+        def on_done(report):
+            self.finish_archive_task()
+            self.show_message(
+                'Success',
+                f"Exported {report['records']} items\n{os.path.basename(path)} "
+                f"({report['size'] / 1048576.0:.1f} MB)"
+            )
+        
+        # 记录快照在主线程中取得，导出期间的修改不影响归档
+        self.archive_io.submit(
+            profiler.wrap('archive_export', task.export),
+            path,
+            list(self.items),
+            on_done=on_done,
+            on_error=lambda e: self.on_archive_failed('Export', e)
+        )
+    
+    def import_archive(self, path):
+        """在归档线程中导入归档：跳过已有的 id，图片进入内容存储，记录分批加入列表"""
+        if self.archive_task is not None:
+            self.show_message('Info', 'A backup is already running')
+            return
+        
+        def on_batch(records):
+            # 在归档线程中调用
+            Clock.schedule_once(lambda dt: self.add_imported_items(records))
+        
+        from archive import ArchiveImporter
+        task = ArchiveImporter(
+            self.content_store,
+            on_batch=on_batch,
+            is_known=lambda item_id: item_id in self.items,
+            progress=self.on_archive_progress
+        )
+        self.start_archive_task(task, 'Importing')
+        
+        def on_done(report):
+            # 排在最后一批记录之后执行
+            Clock.schedule_once(lambda dt: finish(report))
+        
+        def finish(report):
+            self.finish_archive_task()
+            self.backfill_dhashes()
+            self.show_message(
+                'Success',
+                f"Imported {report['imported']} items\n"
+                f"{report['skipped']} already present"
+            )
+        
+        self.archive_io.submit(
+            profiler.wrap('archive_import', task.run),
+            path,
+            on_done=on_done,
+            on_error=lambda e: self.on_archive_failed('Import', e)
+        )
+    
+    def add_imported_items(self, records):
+        """加入一批导入的记录：写入集合和索引、合并持久化，列表只更新一次"""
         try:
-            Logger.info(f"App: Saving {len(self.items)} items to: {self.data_file}")
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.items, f, ensure_ascii=False, indent=2)
-            Logger.info("App: Data saved successfully")
+            added = 0
+            for item in records:
+                self.content_store.claim(item.get('image_hash'))
+                if item['id'] in self.items:
+                    # 导入期间出现了相同 id，归还图片引用
+                    self.release_images([item])
+                    continue
+                self.items.add(item)
+                self.save_item(item)
+                self.similarity.add(item)
+                self.search_index.add(item)
+                added += 1
+            if not added:
+                return
+            self.mark_search_dirty()
+            if self.view_filter is None:
+                self.loaded_count = max(self.loaded_count, self.page_size)
+                self.reload_visible()
+        except Exception as e:
+            Logger.error(f"App: Add imported items failed: {e}")
+    
+    def start_archive_task(self, task, title):
+        """记录进行中的任务并显示进度对话框（可取消）"""
+        self.archive_task = task
+        content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+        label = Label(text='Starting...', font_name='Roboto')
+        bar = ProgressBar(max=1)
+        cancel_btn = Button(
+            text='Cancel',
+            size_hint_y=None,
+            height=dp(44),
+            font_name='Roboto'
+        )
+        cancel_btn.bind(on_press=lambda x: task.cancel())
+        content.add_widget(label)
+        content.add_widget(bar)
+        content.add_widget(cancel_btn)
+        popup = Popup(
+            title=title,
+            content=content,
+            size_hint=(0.8, 0.35),
+            auto_dismiss=False
+        )
+        self.archive_progress = (popup, label, bar)
+        popup.open()
+    
+    def on_archive_progress(self, stage, done, total):
+        """归档进度（在归档线程中调用，已限频），转到主线程更新对话框"""
+        Clock.schedule_once(lambda dt: self.update_archive_progress(stage, done, total))
+    
+    def update_archive_progress(self, stage, done, total):
+        if self.archive_progress is None:
+            return
+        popup, label, bar = self.archive_progress
+        label.text = f'{stage.capitalize()}: {done} / {total}'
+        bar.max = max(total, 1)
+        bar.value = min(done, bar.max)
+    
+    def finish_archive_task(self):
+        self.archive_task = None
+        if self.archive_progress is not None:
+            self.archive_progress[0].dismiss()
+            self.archive_progress = None
+    
+    def on_archive_failed(self, operation, e):
+        """导出 / 导入失败或被取消（导入中已入库的记录保留，重新导入时继续）"""
+        # 导入时排在已交出的记录之后处理
+        Clock.schedule_once(lambda dt: self.finish_archive_task())
+        from archive import ArchiveCancelled
+        if isinstance(e, ArchiveCancelled):
+            Logger.info(f"App: {operation} cancelled")
+            self.show_message('Info', f'{operation} cancelled')
+            return
+        Logger.error(f"App: {operation} failed: {e}")
+        self.show_message('Error', f'{operation} failed:\n{str(e)}')
+    
+    def export_trace(self):
+        """把计时区间导出为 Chrome trace 文件（数据目录下的 perf_trace.json）"""
+        if not profiler.enabled or not getattr(self, 'data_dir', None):
+            return
+        trace_file = os.path.join(self.data_dir, 'perf_trace.json')
+        self.io.submit(
+            profiler.export_trace,
+            trace_file,
+            on_done=lambda count: Logger.info(f"App: Exported {count} trace events to {trace_file}"),
+            on_error=lambda e: Logger.error(f"App: Trace export failed: {e}")
+        )
+    
+    def show_image(self, image_path, item_id=None):
+        """全屏查看原图"""
+        try:
+            Logger.info(f"App: Opening image: {image_path}")
+            
+            content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+            content.add_widget(Image(
+                source=image_path,
+                allow_stretch=True,
+                keep_ratio=True
+            ))
+            
+            popup = Popup(
+                title='Photo',
+                content=content,
+                size_hint=(0.95, 0.9)
+            )
+            
+            btn_layout = BoxLayout(size_hint_y=0.1, spacing=10)
+            
+            # 有感知哈希的记录可以查找相似照片
+            if item_id and item_id in self.similarity.hashes:
+                similar_btn = Button(text='Similar', font_name='Roboto')
+                similar_btn.bind(on_press=lambda x: (popup.dismiss(), self.show_similar(item_id)))
+                btn_layout.add_widget(similar_btn)
+            
+            close_btn = Button(
+                text='Close',
+                font_name='Roboto'
+            )
+            close_btn.bind(on_press=popup.dismiss)
+            btn_layout.add_widget(close_btn)
+            content.add_widget(btn_layout)
+            
+            popup.open()
+            
         except Exception as e:
-            Logger.error(f"App: Save data failed: {e}")
+            Logger.error(f"App: Show image failed: {e}")
     
     def show_message(self, title, message):
         """显示消息提示"""
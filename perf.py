@@ -0,0 +1,187 @@
+"""性能计时工具"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from kivy.logger import Logger
+
+
+class StartupTimer:
+    """冷启动分阶段计时
+
+    mark(phase) 记录从上一个标记到现在的耗时；report() 输出各阶段耗时，
+    并可追加到 JSON Lines 文件中，便于跟踪桌面和设备上的冷启动回归。
+    """
+    def __init__(self, origin=None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.last = self.origin
+        self.phases = []
+        self.reported = False
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000.0))
+        self.last = now
+
+    def total_ms(self):
+        return (self.last - self.origin) * 1000.0
+
+    def report(self, report_file=None, platform_name=''):
+        """输出启动耗时报告（只输出一次）"""
+        if self.reported:
+            return
+        self.reported = True
+
+        for phase, ms in self.phases:
+            Logger.info(f"Startup: {phase:<12} {ms:8.1f} ms")
+        Logger.info(f"Startup: {'total':<12} {self.total_ms():8.1f} ms")
+
+        if report_file:
+            record = {
+                'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'platform': platform_name,
+                'phases': {phase: round(ms, 1) for phase, ms in self.phases},
+                'total_ms': round(self.total_ms(), 1)
+            }
+            try:
+                with open(report_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + '\n')
+            except OSError as e:
+                Logger.warning(f"Startup: Failed to write report: {e}")
+
+
+class _NullSpan:
+    """关闭计时时使用的空上下文"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        self.profiler.record(self.name, (end - self.start) * 1000.0, self.start)
+        return False
+
+
+class Profiler:
+    """热点路径的计时区间与计数器
+
+    span(name) 记录一段代码的耗时，count(name) 累加计数，record(name, ms) 记录在别处
+    测得的耗时（如拍照到卡片显示的延迟）。关闭时 span 返回共享的空上下文、count 直接
+    返回，开销只有一次属性判断。开启后保留每个名称的次数 / 总耗时 / 最大耗时、最近
+    history 个区间（供性能浮层显示），以及最多 max_events 个事件，可导出为 Chrome
+    trace 格式（chrome://tracing 或 Perfetto 打开）离线分析。I/O 线程和缩略图线程中
+    也可以使用。
+    """
+    def __init__(self, enabled=False, history=20, max_events=100000):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.stats = {}
+        self.counters = {}
+        self.recent = deque(maxlen=history)
+        self._events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def wrap(self, name, fn):
+        """把函数包装成计时区间（用于交给 I/O 线程执行的函数），关闭时原样返回"""
+        if not self.enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            with self.span(name):
+                return fn(*args, **kwargs)
+        return timed
+
+    def record(self, name, duration_ms, start=None):
+        if not self.enabled:
+            return
+        if start is None:
+            start = time.perf_counter() - duration_ms / 1000.0
+        thread = threading.current_thread().name
+        with self._lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                self.stats[name] = [1, duration_ms, duration_ms]
+            else:
+                stat[0] += 1
+                stat[1] += duration_ms
+                if duration_ms > stat[2]:
+                    stat[2] = duration_ms
+            self.recent.append((name, duration_ms))
+            self._events.append((name, start, duration_ms, thread))
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        """各区间的 (名称, 次数, 平均 ms, 最大 ms)，按总耗时降序"""
+        with self._lock:
+            stats = sorted(self.stats.items(), key=lambda entry: entry[1][1], reverse=True)
+        return [(name, n, total / n, worst) for name, (n, total, worst) in stats]
+
+    def log_summary(self):
+        for name, n, mean, worst in self.summary():
+            Logger.info(f"Profile: {name:<16} {n:6d} x {mean:8.2f} ms (max {worst:.1f} ms)")
+        for name, value in sorted(self.counters.items()):
+            Logger.info(f"Profile: {name:<16} {value:6d}")
+
+    def export_trace(self, path):
+        """导出 Chrome trace 格式的 JSON（在 I/O 线程中执行），返回事件数"""
+        with self._lock:
+            events = list(self._events)
+            counters = dict(self.counters)
+        threads = {}
+        trace = []
+        for name, start, duration_ms, thread in events:
+            tid = threads.setdefault(thread, len(threads) + 1)
+            trace.append({
+                'name': name,
+                'ph': 'X',
+                'ts': round((start - self.origin) * 1e6),
+                'dur': round(duration_ms * 1000.0),
+                'pid': 1,
+                'tid': tid
+            })
+        for thread, tid in threads.items():
+            trace.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid,
+                          'args': {'name': thread}})
+        data = {'traceEvents': trace, 'otherData': {'counters': counters}}
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        return len(events)
+
+
+# 全局实例，由应用在启动时按环境变量开启
+profiler = Profiler()
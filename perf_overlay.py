@@ -0,0 +1,95 @@
+"""性能浮层：帧耗时与最近的计时区间"""
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.graphics import Color, Rectangle
+from kivy.metrics import dp
+from kivy.uix.behaviors import ButtonBehavior
+from kivy.uix.label import Label
+
+# 超过该帧耗时（ms）计为掉帧
+SLOW_FRAME_MS = 1000.0 / 30
+
+
+class PerfOverlay(ButtonBehavior, Label):
+    """显示在窗口右上角的性能浮层，点击时调用 on_export（导出 trace）
+
+    每帧记录帧间隔，每 refresh_interval 秒刷新一次文字：平均 / 最差帧耗时、
+    纹理缓存命中率，以及 profiler 中最近的计时区间。
+    """
+    def __init__(self, profiler, texture_cache=None, on_export=None,
+                 refresh_interval=0.5, **kwargs):
+        kwargs.setdefault('font_name', 'Roboto')
+        kwargs.setdefault('font_size', '11sp')
+        super().__init__(
+            size_hint=(None, None),
+            halign='left',
+            valign='top',
+            color=(0.6, 1, 0.6, 1),
+            **kwargs
+        )
+        self.profiler = profiler
+        self.texture_cache = texture_cache
+        self.on_export = on_export
+        self.refresh_interval = refresh_interval
+        self._frame_times = []
+        self._frame_event = None
+        self._refresh_event = None
+        with self.canvas.before:
+            Color(0, 0, 0, 0.6)
+            self._background = Rectangle()
+        self.bind(pos=self._update_background, size=self._update_background)
+        self.bind(texture_size=self._update_size)
+        Window.bind(size=self._place)
+
+    def show(self):
+        if self.parent is None:
+            Window.add_widget(self)
+        self._frame_event = Clock.schedule_interval(self._on_frame, 0)
+        self._refresh_event = Clock.schedule_interval(self._refresh, self.refresh_interval)
+        self._refresh(0)
+
+    def hide(self):
+        for event in (self._frame_event, self._refresh_event):
+            if event is not None:
+                event.cancel()
+        self._frame_event = self._refresh_event = None
+        if self.parent is not None:
+            Window.remove_widget(self)
+
+    def on_press(self):
+        if self.on_export:
+            self.on_export()
+
+    def _on_frame(self, dt):
+        ms = dt * 1000.0
+        self._frame_times.append(ms)
+        if ms > SLOW_FRAME_MS:
+            self.profiler.count('slow_frames')
+
+    def _refresh(self, dt):
+        frames = self._frame_times
+        self._frame_times = []
+        lines = []
+        if frames:
+            mean = sum(frames) / len(frames)
+            lines.append(f'frame {mean:5.1f} ms  max {max(frames):5.1f} ms  '
+                         f'{Clock.get_fps():4.0f} fps')
+        if self.texture_cache is not None:
+            stats = self.texture_cache.stats()
+            lines.append(f"textures {stats['entries']}  "
+                         f"{stats['bytes'] / 1048576.0:.1f} MB  hit {stats['hit_rate']:.0%}")
+        # 最近的区间，新的在上
+        for name, ms in reversed(list(self.profiler.recent)):
+            lines.append(f'{name:<16} {ms:7.1f} ms')
+        self.text = '\n'.join(lines)
+
+    def _update_size(self, instance, texture_size):
+        self.size = (texture_size[0] + dp(12), texture_size[1] + dp(8))
+        self._place()
+
+    def _place(self, *args):
+        self.pos = (Window.width - self.width, Window.height - self.height)
+
+    def _update_background(self, *args):
+        self._background.pos = self.pos
+        self._background.size = self.size
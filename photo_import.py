@@ -0,0 +1,59 @@
+"""拍摄照片导入：方向校正、缩放与重新编码"""
+import os
+
+from kivy.logger import Logger
+
+
+def import_photo(photo_path, max_dimension=2048, quality=85):
+    """就地规范化一张照片（在后台线程中调用）
+
+    按 EXIF 方向旋转，长边缩放到 max_dimension 以内并以 quality 重新编码为 JPEG。
+    结果比原文件还大且无需旋转 / 缩放时保留原文件。
+    返回 {'original_size', 'stored_size', 'width', 'height'}。
+    """
+    original_size = os.path.getsize(photo_path)
+    result = {
+        'original_size': original_size,
+        'stored_size': original_size,
+        'width': None,
+        'height': None
+    }
+
+    try:
+        from PIL import Image as PILImage, ImageOps
+    except ImportError:
+        Logger.warning("PhotoImport: PIL not available, keeping original photo")
+        return result
+
+    tmp_path = photo_path + '.import.tmp'
+    with PILImage.open(photo_path) as img:
+        original_dims = img.size
+        orientation = img.getexif().get(0x0112, 1)
+        # JPEG 在解码阶段按 1/2、1/4、1/8 降采样，避免完整解码大图
+        img.draft('RGB', (max_dimension, max_dimension))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.thumbnail((max_dimension, max_dimension))
+        transformed = orientation != 1 or img.size != original_dims
+
+        save_kwargs = {'quality': quality, 'optimize': True}
+        exif = img.info.get('exif')
+        if exif:
+            save_kwargs['exif'] = exif
+        img.save(tmp_path, 'JPEG', **save_kwargs)
+        result['width'], result['height'] = img.size
+
+    stored_size = os.path.getsize(tmp_path)
+    if stored_size >= original_size and not transformed:
+        os.remove(tmp_path)
+        result['width'], result['height'] = original_dims
+        return result
+
+    os.replace(tmp_path, photo_path)
+    result['stored_size'] = stored_size
+    Logger.info(
+        f"PhotoImport: {os.path.basename(photo_path)} "
+        f"{original_size} -> {stored_size} bytes ({result['width']}x{result['height']})"
+    )
+    return result
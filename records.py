@@ -0,0 +1,255 @@
+"""紧凑的物品记录与快照格式"""
+import os
+import time
+from datetime import datetime
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+SNAPSHOT_FORMAT = 'items-compact/1'
+
+# 记录的固定字段（快照中每行按此顺序存放），其余字段放在 extra 字典中
+FIELDS = (
+    'id', 'timestamp', 'image_path', 'captured_at', 'image_hash', 'dhash',
+    'original_size', 'stored_size', 'title', 'tags', 'updated_at'
+)
+
+
+def encode_id(value):
+    """数字 id（如 '20240101120000123456'）存为整数，不能无损转换的保持字符串"""
+    if isinstance(value, str) and value.isdigit() and value[0] != '0':
+        return int(value)
+    return value
+
+
+def decode_id(value):
+    return str(value) if isinstance(value, int) else value
+
+
+def encode_timestamp(value):
+    """'YYYY-mm-dd HH:MM:SS' 存为 epoch 秒，不能无损转换（如夏令时重复的时刻）的保持字符串"""
+    if not isinstance(value, str):
+        return value
+    try:
+        seconds = int(time.mktime(time.strptime(value, TIMESTAMP_FORMAT)))
+    except (ValueError, OverflowError):
+        return value
+    return seconds if decode_timestamp(seconds) == value else value
+
+
+def decode_timestamp(value):
+    if isinstance(value, int):
+        return datetime.fromtimestamp(value).strftime(TIMESTAMP_FORMAT)
+    return value
+
+
+def encode_path(value):
+    """数据目录下的路径存为相对路径"""
+    base = ItemRecord.base_dir
+    if base and isinstance(value, str) and value.startswith(base + os.sep):
+        return value[len(base) + 1:]
+    return value
+
+
+def decode_path(value):
+    base = ItemRecord.base_dir
+    if base and value and not os.path.isabs(value):
+        return os.path.join(base, value)
+    return value
+
+
+def content_path(digest):
+    """内容存储中的相对路径，与 image_store.ContentStore.path_for 一致"""
+    return os.path.join('images', digest[:2], digest + '.jpg')
+
+
+def encode_dhash(value):
+    return int(value, 16) if isinstance(value, str) and value else value
+
+
+def decode_dhash(value):
+    return f'{value:016x}' if isinstance(value, int) else value
+
+
+# 字段名 -> (解码, 编码)，未列出的字段原样存放
+_CODECS = {
+    'id': (decode_id, encode_id),
+    'timestamp': (decode_timestamp, encode_timestamp),
+    'image_path': (decode_path, encode_path),
+    'dhash': (decode_dhash, encode_dhash),
+}
+_FIELD_SET = frozenset(FIELDS)
+
+
+class ItemRecord:
+    """一条物品记录
+
+    字段存放在 __slots__ 中：id 为整数、timestamp 为 epoch 秒、image_path 为相对
+    base_dir 的路径（就是内容存储中按 image_hash 计算出的路径时不保存）、dhash 为整数。对外提供与原来的 dict 相同的 get / [] / in / update
+    接口，读写时自动转换，调用方无需区分；只有写 JSON（日志、SQLite）时才转换回 dict。
+    值为 None 的字段视为不存在。
+    """
+    __slots__ = FIELDS + ('extra',)
+
+    # 相对路径的基准目录（数据目录），由应用在初始化存储时设置
+    base_dir = None
+
+    def __init__(self, id=None, timestamp=None, image_path=None, captured_at=None,
+                 image_hash=None, dhash=None, original_size=None, stored_size=None,
+                 title=None, tags=None, updated_at=None, extra=None):
+        # 参数为已编码的值，与快照中一行的顺序相同
+        self.id = id
+        self.timestamp = timestamp
+        self.image_path = image_path
+        self.captured_at = captured_at
+        self.image_hash = image_hash
+        self.dhash = dhash
+        self.original_size = original_size
+        self.stored_size = stored_size
+        self.title = title
+        self.tags = tags
+        self.updated_at = updated_at
+        self.extra = extra
+
+    @classmethod
+    def set_base_dir(cls, base_dir):
+        cls.base_dir = os.path.abspath(base_dir) if base_dir else None
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls()
+        record.update(data)
+        return record
+
+    @classmethod
+    def from_row(cls, row):
+        """快照中的一行（已编码的值）-> 记录"""
+        return cls(*row)
+
+    def to_row(self):
+        """记录 -> 快照中的一行，省略末尾的空值"""
+        row = [getattr(self, name) for name in self.__slots__]
+        while row and row[-1] is None:
+            row.pop()
+        return row
+
+    def to_dict(self):
+        """转换回原来的 JSON 对象格式"""
+        data = {}
+        for name in FIELDS:
+            value = self.get(name)
+            if value is not None:
+                data[name] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is None:
+                if key == 'image_path' and self.image_hash:
+                    return decode_path(content_path(self.image_hash))
+                return default
+            codec = _CODECS.get(key)
+            return codec[0](value) if codec else value
+        if self.extra:
+            return self.extra.get(key, default)
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            codec = _CODECS.get(key)
+            setattr(self, key, codec[1](value) if codec and value is not None else value)
+            if key in ('image_path', 'image_hash'):
+                self._drop_derived_path()
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def _drop_derived_path(self):
+        """图片路径可由 image_hash 推算时不单独保存"""
+        if self.image_hash and self.image_path == content_path(self.image_hash):
+            self.image_path = None
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def update(self, data):
+        for key, value in data.items():
+            self[key] = value
+
+    def __repr__(self):
+        return f'ItemRecord({self.to_dict()!r})'
+
+
+def as_record(item):
+    """dict -> ItemRecord（已是记录时原样返回）"""
+    return item if isinstance(item, ItemRecord) else ItemRecord.from_dict(item)
+
+
+def as_dict(item):
+    """ItemRecord -> dict（已是 dict 时原样返回），用于写 JSON"""
+    return item.to_dict() if isinstance(item, ItemRecord) else item
+
+
+def snapshot_data(items):
+    """全部记录 -> 紧凑快照（字段表 + 每条记录一行）"""
+    return {
+        'format': SNAPSHOT_FORMAT,
+        'fields': list(ItemRecord.__slots__),
+        'rows': [as_record(item).to_row() for item in items]
+    }
+
+
+def row_decoder(header):
+    """按快照头部（format / fields）返回 行 -> 记录 的转换函数
+
+    行不是列表或字段数不对时转换函数抛出 ValueError。
+    """
+    if header.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError(f"unknown snapshot format {header.get('format')!r}")
+    fields = header.get('fields')
+    if fields == list(ItemRecord.__slots__):
+        def decode(row):
+            if not isinstance(row, list) or len(row) > len(fields):
+                raise ValueError('malformed row')
+            return ItemRecord.from_row(row)
+        return decode
+
+    # 字段表与当前版本不同：按字段名对应
+    def decode_by_name(row):
+        if not isinstance(row, list) or len(row) > len(fields):
+            raise ValueError('malformed row')
+        record = ItemRecord()
+        for name, value in zip(fields, row):
+            if name == 'extra':
+                record.extra = value
+            elif name in _FIELD_SET:
+                setattr(record, name, value)
+            elif value is not None:
+                record[name] = value
+        return record
+    return decode_by_name
+
+
+def record_from_dict(data):
+    """旧格式（JSON 对象）-> 记录，不是对象时抛出 ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError('malformed item')
+    return ItemRecord.from_dict(data)
+
+
+def records_from_snapshot(data):
+    """解析整个快照：紧凑格式直接按行构造，旧的 JSON 数组逐条转换"""
+    if isinstance(data, list):
+        return [ItemRecord.from_dict(item) for item in data if isinstance(item, dict)]
+    if not isinstance(data, dict):
+        raise ValueError('unknown snapshot format')
+    decode = row_decoder(data)
+    return [decode(row) for row in data.get('rows', [])]
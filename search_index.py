@@ -0,0 +1,268 @@
+"""标题 / 标签全文检索（倒排索引）"""
+import bisect
+import json
+import os
+import re
+import time
+
+from kivy.logger import Logger
+
+from storage import write_json_atomic
+
+# 中日韩文字按二元组切分，其余文字按连续的字母 / 数字切分
+_CJK = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+_TOKEN_RE = re.compile(f'([{_CJK}]+)|([^\\W_{_CJK}]+)')
+
+_TAG_SEPARATOR_RE = re.compile(r'[,，、;；\s]+')
+
+INDEX_VERSION = 1
+
+
+def tokenize(text):
+    """切分查询，返回 [(词, 是否前缀匹配)]
+
+    字母 / 数字词按前缀匹配；单个汉字精确匹配单字，两个及以上汉字切成相邻二元组精确匹配。
+    """
+    tokens = []
+    for cjk, word in _TOKEN_RE.findall(text.lower()):
+        if word:
+            tokens.append((word, True))
+        elif len(cjk) == 1:
+            tokens.append((cjk, False))
+        else:
+            tokens.extend((cjk[i:i + 2], False) for i in range(len(cjk) - 1))
+    return tokens
+
+
+def index_terms(text):
+    """记录中需要索引的词：字母 / 数字词，以及每个汉字和相邻二元组"""
+    terms = set()
+    for cjk, word in _TOKEN_RE.findall(text.lower()):
+        if word:
+            terms.add(word)
+        else:
+            terms.update(cjk)
+            terms.update(cjk[i:i + 2] for i in range(len(cjk) - 1))
+    return terms
+
+
+def parse_tags(text):
+    """把输入的标签文本拆成去重后的列表，支持中英文逗号、顿号、分号和空白分隔"""
+    tags = []
+    for tag in _TAG_SEPARATOR_RE.split(text):
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def item_text(item):
+    """参与检索的文本：标题和标签"""
+    return ' '.join([item.get('title') or ''] + list(item.get('tags') or []))
+
+
+class SearchIndex:
+    """增量维护的倒排索引
+
+    postings 为 词 -> 记录 id 集合，docs 为 记录 id -> 词列表（删除时使用），
+    另有有序词表用于二分查找前缀。新增 / 删除 / 编辑只更新对应记录的词，不重建。
+    索引快照保存在 items_data.json 旁的 items_data.search.json 中（只保存 docs），
+    之后的变更以 {"saved_at": ..., "changes": {id: 词列表或 null}} 逐批追加到
+    items_data.search.log，保存一次只写变更过的记录；日志累计的记录数超过索引大小
+    （至少 compact_min）时改写一次快照并清空日志。加载时读取快照并重放日志，再与
+    记录按 id 对账，重新索引保存之后编辑过（updated_at 较新）的记录。
+    """
+    def __init__(self, index_file, compact_min=1000):
+        self.index_file = index_file
+        self.log_file = os.path.splitext(index_file)[0] + '.log'
+        self.compact_min = compact_min
+        self.postings = {}
+        self.docs = {}
+        self.saved_at = 0.0
+        self.loaded = False
+        # 日志中累计的记录数
+        self.log_entries = 0
+        # 尚未保存的变更：id -> 词列表（None 表示删除）
+        self._changes = {}
+        self._vocab = []
+
+    def __len__(self):
+        return len(self.docs)
+
+    @property
+    def dirty(self):
+        return bool(self._changes)
+
+    def add(self, item):
+        """索引一条记录（已存在时先移除旧词）"""
+        item_id = item.get('id')
+        if not item_id:
+            return
+        self.remove(item_id)
+        words = sorted(index_terms(item_text(item)))
+        self.docs[item_id] = words
+        self._changes[item_id] = words
+        for word in words:
+            ids = self.postings.get(word)
+            if ids is None:
+                ids = self.postings[word] = set()
+                bisect.insort(self._vocab, word)
+            ids.add(item_id)
+
+    def remove(self, item_id):
+        words = self.docs.pop(item_id, None)
+        if words is None:
+            return
+        self._changes[item_id] = None
+        for word in words:
+            ids = self.postings.get(word)
+            if ids is None:
+                continue
+            ids.discard(item_id)
+            if not ids:
+                del self.postings[word]
+                del self._vocab[bisect.bisect_left(self._vocab, word)]
+
+    def search(self, query):
+        """返回同时匹配查询中全部词的记录 id 集合；查询为空时返回 None"""
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        matches = [self._match(word, prefix) for word, prefix in tokens]
+        # 从最小的集合开始求交集
+        matches.sort(key=len)
+        result = set(matches[0])
+        for ids in matches[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+    def _match(self, word, prefix):
+        if not prefix:
+            return self.postings.get(word, set())
+        start = bisect.bisect_left(self._vocab, word)
+        end = bisect.bisect_left(self._vocab, word + '\uffff', start)
+        if end - start == 1:
+            return self.postings[self._vocab[start]]
+        ids = set()
+        for token in self._vocab[start:end]:
+            ids |= self.postings[token]
+        return ids
+
+    def sync(self, items):
+        """与当前记录对账：补充缺少 / 编辑过的记录，移除已不存在的记录"""
+        started = time.perf_counter()
+        current = set()
+        added = 0
+        for item in items:
+            item_id = item.get('id')
+            current.add(item_id)
+            if item_id not in self.docs or item.get('updated_at', 0) > self.saved_at:
+                self.add(item)
+                added += 1
+        stale = [item_id for item_id in self.docs if item_id not in current]
+        for item_id in stale:
+            self.remove(item_id)
+        elapsed = (time.perf_counter() - started) * 1000.0
+        Logger.info(
+            f"Search: Synced index ({len(self.docs)} items, {added} indexed, "
+            f"{len(stale)} removed) in {elapsed:.0f} ms"
+        )
+        return added + len(stale)
+
+    def load(self):
+        """读取已保存的快照并重放日志（在 I/O 线程中执行），文件缺失或损坏时从空索引开始"""
+        self.loaded = True
+        docs = {}
+        saved_at = 0.0
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') != INDEX_VERSION:
+                    raise ValueError(f"unsupported version {data.get('version')}")
+                docs = data['docs']
+                saved_at = float(data.get('saved_at', 0.0))
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                Logger.warning(f"Search: Ignoring unreadable index ({e}), rebuilding")
+                # 日志只相对快照有意义，一起丢弃
+                return
+        saved_at = self._replay_log(docs, saved_at)
+
+        postings = {}
+        for item_id, words in docs.items():
+            for word in words:
+                ids = postings.get(word)
+                if ids is None:
+                    ids = postings[word] = set()
+                ids.add(item_id)
+        self.docs = docs
+        self.postings = postings
+        self._vocab = sorted(postings)
+        self.saved_at = saved_at
+        Logger.info(f"Search: Loaded index for {len(docs)} items ({self.log_entries} logged changes)")
+
+    def _replay_log(self, docs, saved_at):
+        """把日志中的变更应用到 docs，返回最后一批的保存时间
+
+        写了一半的最后一行截断（之后的追加从新行开始），损坏的行跳过。
+        """
+        self.log_entries = 0
+        if not os.path.exists(self.log_file):
+            return saved_at
+        good_end = 0
+        with open(self.log_file, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                good_end += len(line)
+                try:
+                    batch = json.loads(line.decode('utf-8'))
+                    changes = batch['changes']
+                    batch_saved_at = float(batch['saved_at'])
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    Logger.warning(f"Search: Skipping unreadable index log line ({e})")
+                    continue
+                for item_id, words in changes.items():
+                    if words is None:
+                        docs.pop(item_id, None)
+                    else:
+                        docs[item_id] = words
+                self.log_entries += len(changes)
+                saved_at = max(saved_at, batch_saved_at)
+            size = f.seek(0, os.SEEK_END)
+        if good_end < size:
+            Logger.warning(f"Search: Dropping {size - good_end} bytes of torn index log tail")
+            with open(self.log_file, 'r+b') as f:
+                f.truncate(good_end)
+        return saved_at
+
+    def pending_save(self):
+        """在主线程中取出待保存的内容交给 I/O 线程，没有变更时返回 None
+
+        通常只有变更过的记录（追加到日志）；日志累计过长时为完整快照。
+        """
+        if not self._changes:
+            return None
+        changes, self._changes = self._changes, {}
+        if self.log_entries + len(changes) >= max(self.compact_min, len(self.docs)):
+            self.log_entries = 0
+            return {
+                'version': INDEX_VERSION,
+                'saved_at': time.time(),
+                'docs': dict(self.docs)
+            }
+        self.log_entries += len(changes)
+        return {'saved_at': time.time(), 'changes': changes}
+
+    def save(self, data):
+        """保存 pending_save() 的结果（在 I/O 线程中执行）"""
+        if 'docs' in data:
+            write_json_atomic(self.index_file, data)
+            # 快照已包含日志中的全部变更
+            with open(self.log_file, 'w', encoding='utf-8'):
+                pass
+        else:
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(data, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.saved_at = data['saved_at']
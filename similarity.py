@@ -0,0 +1,257 @@
+"""感知哈希（dHash）与相似照片检索"""
+from itertools import combinations
+
+from kivy.logger import Logger
+
+HASH_SIZE = 8
+
+
+def _load_gray(path, hash_size=HASH_SIZE):
+    """解码并缩小为 (hash_size + 1) x hash_size 的灰度图"""
+    from PIL import Image as PILImage
+    with PILImage.open(path) as img:
+        # JPEG 在解码阶段直接降采样
+        img.draft('L', (hash_size * 8, hash_size * 8))
+        return img.convert('L').resize((hash_size + 1, hash_size), PILImage.BILINEAR)
+
+
+def dhash(path, hash_size=HASH_SIZE):
+    """计算单张图片的 dHash，返回 16 位十六进制字符串"""
+    pixels = list(_load_gray(path, hash_size).getdata())
+    width = hash_size + 1
+    value = 0
+    for row in range(hash_size):
+        offset = row * width
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f'{value:0{hash_size * hash_size // 4}x}'
+
+
+def dhash_batch(paths, hash_size=HASH_SIZE):
+    """批量计算 dHash（用于回填旧记录）
+
+    有 numpy 时把所有缩略灰度图堆成一个数组，一次完成比较和位打包；
+    否则逐张计算。无法读取的图片返回 None。
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    if np is None:
+        results = []
+        for path in paths:
+            try:
+                results.append(dhash(path, hash_size))
+            except Exception as e:
+                Logger.warning(f"Similarity: Failed to hash {path}: {e}")
+                results.append(None)
+        return results
+
+    arrays = []
+    valid = []
+    for index, path in enumerate(paths):
+        try:
+            arrays.append(np.asarray(_load_gray(path, hash_size), dtype=np.int16))
+            valid.append(index)
+        except Exception as e:
+            Logger.warning(f"Similarity: Failed to hash {path}: {e}")
+
+    results = [None] * len(paths)
+    if not arrays:
+        return results
+
+    stack = np.stack(arrays)                       # (N, hash_size, hash_size + 1)
+    bits = stack[:, :, :-1] > stack[:, :, 1:]      # (N, hash_size, hash_size)
+    packed = np.packbits(bits.reshape(len(arrays), -1), axis=1)
+    for index, row in zip(valid, packed):
+        results[index] = row.tobytes().hex()
+    return results
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+if hasattr(int, 'bit_count'):
+    # Python 3.10+：直接数位，比 bin().count() 快数倍
+    def hamming(a, b):
+        return (a ^ b).bit_count()
+
+
+class BKTree:
+    """按汉明距离组织的 BK 树
+
+    查询时利用三角不等式剪枝，只访问距离可能满足条件的子树。
+    删除使用墓碑标记，墓碑过多时由 SimilarityIndex 重建。
+    """
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value, key):
+        node = [value, [key], {}]
+        if self.root is None:
+            self.root = node
+            self.size = 1
+            return
+        current = self.root
+        while True:
+            distance = hamming(value, current[0])
+            if distance == 0:
+                current[1].append(key)
+                self.size += 1
+                return
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                self.size += 1
+                return
+            current = child
+
+    def search(self, value, max_distance):
+        """返回 [(距离, key)]，按距离升序"""
+        results = []
+        if self.root is None:
+            return results
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                results.extend((distance, key) for key in node[1])
+            low, high = distance - max_distance, distance + max_distance
+            for child_distance, child in node[2].items():
+                if low <= child_distance <= high:
+                    stack.append(child)
+        results.sort()
+        return results
+
+
+class SimilarityIndex:
+    """记录 id -> dHash，并用 BK 树支持相似检索；近似重复标记在增删时维护
+
+    近似重复（距离不超过 duplicate_distance）用分段索引查找：64 位哈希切成
+    SEGMENTS 段，距离不超过 d 的两个哈希至少有一段相差不超过 d // SEGMENTS 位，
+    只需在每段的桶中查该段的近邻值并比较这些候选。结果保存在 near_duplicates
+    集合中（rebuild 时原地更新，可被外部持有），渲染卡片时只做集合查询。
+    """
+    SEGMENTS = 4
+
+    def __init__(self, duplicate_distance=6):
+        self.duplicate_distance = duplicate_distance
+        self.hashes = {}
+        self.near_duplicates = set()
+        self._tree = BKTree()
+        self._stale = 0
+        bits = HASH_SIZE * HASH_SIZE
+        parts = self.SEGMENTS
+        bounds = [bits * i // parts for i in range(parts + 1)]
+        # 每段的 (右移位数, 掩码)
+        self._segments = [
+            (low, (1 << (high - low)) - 1) for low, high in zip(bounds, bounds[1:])
+        ]
+        # 段内相差不超过 radius 位的翻转掩码（含 0）
+        radius = duplicate_distance // parts
+        self._flips = [
+            [sum(1 << bit for bit in bits_) for r in range(radius + 1)
+             for bits_ in combinations(range(high - low), r)]
+            for low, high in zip(bounds, bounds[1:])
+        ]
+        # 每段：段值 -> 记录 id 集合
+        self._buckets = [{} for _ in self._segments]
+
+    def rebuild(self, items):
+        self.hashes = {}
+        self.near_duplicates.clear()
+        self._tree = BKTree()
+        self._stale = 0
+        self._buckets = [{} for _ in self._segments]
+        for item in items:
+            value = item.get('dhash')
+            item_id = item.get('id')
+            if value and item_id:
+                self._insert(item_id, int(value, 16))
+        # 全部入索引后再标记，每条记录找到一个候选即可停止
+        for item_id, value in self.hashes.items():
+            if self._duplicates_of(item_id, value, first_only=True):
+                self.near_duplicates.add(item_id)
+
+    def add(self, item):
+        """加入 / 更新记录的哈希，同时更新它和与它近似的记录的重复标记"""
+        value = item.get('dhash')
+        item_id = item.get('id')
+        if not value or not item_id:
+            return
+        if item_id in self.hashes:
+            self.remove(item_id)
+        value = int(value, 16)
+        self._insert(item_id, value)
+        duplicates = self._duplicates_of(item_id, value)
+        if duplicates:
+            self.near_duplicates.add(item_id)
+            self.near_duplicates.update(duplicates)
+
+    def remove(self, item_id):
+        value = self.hashes.pop(item_id, None)
+        if value is None:
+            return
+        for bucket, key in zip(self._buckets, self._segment_keys(value)):
+            keys = bucket.get(key)
+            keys.discard(item_id)
+            if not keys:
+                del bucket[key]
+        # 原来只与它近似的记录不再标记为重复
+        if item_id in self.near_duplicates:
+            self.near_duplicates.discard(item_id)
+            for key in self._duplicates_of(item_id, value):
+                if not self._duplicates_of(key, self.hashes[key], first_only=True):
+                    self.near_duplicates.discard(key)
+        # 树中的节点保留为墓碑，过多时重建
+        self._stale += 1
+        if self._stale > max(64, self._tree.size // 2):
+            self._tree = BKTree()
+            self._stale = 0
+            for key, value in self.hashes.items():
+                self._tree.add(value, key)
+
+    def _insert(self, item_id, value):
+        self.hashes[item_id] = value
+        self._tree.add(value, item_id)
+        for bucket, key in zip(self._buckets, self._segment_keys(value)):
+            bucket.setdefault(key, set()).add(item_id)
+
+    def _segment_keys(self, value):
+        return [(value >> shift) & mask for shift, mask in self._segments]
+
+    def _duplicates_of(self, item_id, value, first_only=False):
+        """与 value 距离不超过 duplicate_distance 的其他记录（不含 item_id）"""
+        found = set()
+        hashes = self.hashes
+        max_distance = self.duplicate_distance
+        for bucket, key, flips in zip(self._buckets, self._segment_keys(value), self._flips):
+            for flip in flips:
+                for other in bucket.get(key ^ flip, ()):
+                    if other == item_id or other in found:
+                        continue
+                    if hamming(value, hashes[other]) <= max_distance:
+                        found.add(other)
+                        if first_only:
+                            return found
+        return found
+
+    def similar(self, item_id, max_distance=12):
+        """与给定记录相似的其他记录，返回 [(距离, id)]"""
+        value = self.hashes.get(item_id)
+        if value is None:
+            return []
+        results = []
+        seen = {item_id}
+        for distance, key in self._tree.search(value, max_distance):
+            # 跳过自身，以及删除 / 重新插入后留下的旧节点
+            current = self.hashes.get(key)
+            if key in seen or current is None or hamming(value, current) != distance:
+                continue
+            seen.add(key)
+            results.append((distance, key))
+        return results
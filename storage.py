@@ -0,0 +1,487 @@
+"""物品数据存储"""
+import json
+import os
+import shutil
+import time
+
+from kivy.logger import Logger
+
+from json_stream import ArrayStream
+from records import (
+    as_dict, as_record, record_from_dict, row_decoder,
+    snapshot_data
+)
+
+# 日志中最多列出的损坏条目数
+MAX_REPORTED_ERRORS = 5
+
+
+def write_json_atomic(path, data):
+    """写临时文件再 rename，崩溃时不会留下半截文件"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_rows_atomic(path, data, key='rows'):
+    """与 write_json_atomic 相同，但 data[key] 数组的每个元素单独一行，便于分块流式读取"""
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    header = {name: value for name, value in data.items() if name != key}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(encode(header)[:-1])
+        f.write((',' if header else '') + encode(key) + ':[')
+        separator = '\n'
+        for row in data[key]:
+            f.write(separator)
+            f.write(encode(row))
+            separator = ',\n'
+        f.write('\n]}')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class JournalStore:
+    """追加式日志存储
+
+    快照为 items_data.json（紧凑格式，见 records.snapshot_data；旧版本的 JSON 数组
+    仍可读取，读取后下一次压缩时升级），每次新增 / 删除只向 items_data.journal 追加一行：
+        {"op": "add", "item": {...}}
+        {"op": "delete", "id": "..."}
+        {"op": "delete_many", "ids": ["...", ...]}
+    日志条数超过 compact_threshold 后由调用方把全部记录压缩回快照。
+    快照逐条流式解析，损坏的条目跳过并报告，其余记录照常加载；日志中损坏的行同样跳过，
+    只有写了一半的最后一行被截断。
+    """
+    def __init__(self, data_file, compact_threshold=200):
+        self.data_file = data_file
+        self.journal_file = os.path.splitext(data_file)[0] + '.journal'
+        self.compact_threshold = compact_threshold
+        self.journal_entries = 0
+        # 快照仍是旧的 JSON 数组格式，需要压缩一次升级
+        self.legacy_snapshot = False
+        # 快照中有跳过的损坏条目，需要压缩一次写出干净的快照
+        self.snapshot_damaged = False
+        # 日志中有跳过的损坏行，需要压缩一次（原日志已另存）
+        self.journal_damaged = False
+        # 最近一次加载跳过的损坏条目数
+        self.skipped_entries = 0
+        # 最近一次加载时快照结构无法识别，原文件移到的路径（否则为 None）
+        self.snapshot_corrupt = None
+        self._journal_errors = []
+        self._journal = None
+
+    def load(self, preview_size=0, on_preview=None):
+        """读取快照并重放日志，返回记录列表
+
+        preview_size > 0 时，读到快照的前 preview_size 条（快照按最新在前写入）后先调用
+        on_preview(记录列表)，界面可以在解析完整个文件之前显示第一页。旧的 JSON 数组
+        快照按添加顺序（最旧在前）保存，开头的记录不是最新一页，不提前显示。
+        """
+        # 日志很短，先重放得到各 id 的最终状态（None 表示已删除），快照中的同 id 记录直接跳过
+        overrides = {}
+        self.journal_entries = 0
+        for record in self._read_journal():
+            self._apply(overrides, record)
+            self.journal_entries += 1
+        journal_items = [item for item in overrides.values() if item is not None]
+
+        # 快照中的 id 不重复（重复时由 ItemCollection 去重），不再建立 id -> 记录 的字典
+        items = []
+        for item in self._iter_snapshot():
+            if overrides and item.get('id') in overrides:
+                continue
+            items.append(item)
+            if on_preview and len(items) == preview_size and not self.legacy_snapshot:
+                on_preview(journal_items + items)
+        items.extend(journal_items)
+        self.skipped_entries += len(self._journal_errors)
+
+        Logger.info(f"Storage: Loaded {len(items)} items ({self.journal_entries} journal entries)")
+        return items
+
+    def add(self, item):
+        """追加新增记录，O(1) 写入"""
+        self._append({'op': 'add', 'item': as_dict(item)})
+
+    def delete(self, item_id):
+        """追加删除记录，O(1) 写入"""
+        self._append({'op': 'delete', 'id': item_id})
+
+    def delete_many(self, item_ids):
+        """批量删除只追加一条记录"""
+        self._append({'op': 'delete_many', 'ids': list(item_ids)})
+
+    def write_batch(self, changes):
+        """一次追加多条变更并只 fsync 一次，返回写入的字节数
+
+        changes 为 [(id, 记录)]，记录为 None 表示删除；每个 id 只出现一次，顺序无关。
+        """
+        records = []
+        deleted = []
+        for item_id, item in changes:
+            if item is None:
+                deleted.append(item_id)
+            else:
+                records.append({'op': 'add', 'item': as_dict(item)})
+        if deleted:
+            records.append({'op': 'delete_many', 'ids': deleted})
+        return self._append_many(records)
+
+    def needs_compaction(self):
+        return (
+            self.legacy_snapshot
+            or self.snapshot_damaged
+            or self.journal_damaged
+            or self.journal_entries >= self.compact_threshold
+        )
+
+    def compact(self, items):
+        """把当前全部记录写成新快照并清空日志，返回快照的字节数"""
+        items = list(items)
+        write_rows_atomic(self.data_file, snapshot_data(items))
+        self.legacy_snapshot = False
+        self.snapshot_damaged = False
+        self.journal_damaged = False
+        self._close_journal()
+        # 快照已包含日志中的全部操作；即使在此处崩溃，重放也是幂等的
+        with open(self.journal_file, 'wb') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_entries = 0
+        Logger.info(f"Storage: Compacted {len(items)} items into snapshot")
+        return os.path.getsize(self.data_file)
+
+    def close(self):
+        self._close_journal()
+
+    def _apply(self, items, record):
+        """重放一条日志，删除的 id 记为 None"""
+        op = record.get('op')
+        if op == 'add':
+            item = as_record(record.get('item') or {})
+            items[item.get('id')] = item
+        elif op == 'delete':
+            items[record.get('id')] = None
+        elif op == 'delete_many':
+            for item_id in record.get('ids', []):
+                items[item_id] = None
+        else:
+            Logger.warning(f"Storage: Unknown journal op: {op}")
+
+    def _append(self, record):
+        return self._append_many([record])
+
+    def _append_many(self, records):
+        if not records:
+            return 0
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'ab')
+        data = ''.join(
+            json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+            for record in records
+        ).encode('utf-8')
+        self._journal.write(data)
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self.journal_entries += len(records)
+        return len(data)
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _iter_snapshot(self):
+        """逐条读取快照中的记录，损坏的条目跳过并在读完后报告"""
+        self.skipped_entries = 0
+        self.snapshot_corrupt = None
+        if not os.path.exists(self.data_file):
+            Logger.info("Storage: No data file found, starting fresh")
+            return
+        with open(self.data_file, 'r', encoding='utf-8') as f:
+            stream = ArrayStream(f, key='rows')
+            try:
+                stream.open()
+                self.legacy_snapshot = stream.header is None
+                decode = record_from_dict if self.legacy_snapshot else row_decoder(stream.header)
+            except ValueError as e:
+                corrupt = e
+            else:
+                corrupt = None
+                for entry in stream:
+                    try:
+                        item = decode(entry)
+                        if item.id is None:
+                            raise ValueError('missing id')
+                    except (ValueError, TypeError) as e:
+                        stream.errors.append((stream.offset, str(e)))
+                        continue
+                    yield item
+
+        if corrupt is not None:
+            # 无法识别文件结构时保留原文件，不能静默清空
+            backup = f'{self.data_file}.corrupt-{int(time.time())}'
+            os.replace(self.data_file, backup)
+            self.snapshot_corrupt = backup
+            Logger.error(f"Storage: Snapshot is corrupt ({corrupt}), moved to {backup}")
+            return
+        self._report_damage(stream.errors)
+
+    def _report_damage(self, errors):
+        """报告跳过的损坏条目；下次压缩会覆盖快照，先复制一份原文件以便找回"""
+        if not errors:
+            return
+        self.skipped_entries = len(errors)
+        self.snapshot_damaged = True
+        backup = f'{self.data_file}.damaged-{int(time.time())}'
+        shutil.copyfile(self.data_file, backup)
+        details = '; '.join(
+            f'offset {offset}: {reason}' for offset, reason in errors[:MAX_REPORTED_ERRORS]
+        )
+        Logger.warning(
+            f"Storage: Skipped {len(errors)} malformed snapshot entries ({details}), "
+            f"original kept as {backup}"
+        )
+
+    def _read_journal(self):
+        """逐行读取日志
+
+        只有没有换行符的最后一行是写了一半的尾部，截断；中间无法解析的行跳过并继续读取
+        后面的记录（原日志先另存一份，下次压缩会清空日志）。
+        """
+        self._journal_errors = []
+        if not os.path.exists(self.journal_file):
+            return
+        good_end = 0
+        offset = 0
+        with open(self.journal_file, 'rb') as f:
+            for line in f:
+                start = offset
+                offset += len(line)
+                if not line.endswith(b'\n'):
+                    break
+                good_end = offset
+                try:
+                    record = json.loads(line.decode('utf-8'))
+                    if not isinstance(record, dict):
+                        raise ValueError('not an object')
+                except ValueError as e:
+                    self._journal_errors.append((start, str(e)))
+                    continue
+                yield record
+            size = f.seek(0, os.SEEK_END)
+
+        if self._journal_errors:
+            self.journal_damaged = True
+            backup = f'{self.journal_file}.damaged-{int(time.time())}'
+            shutil.copyfile(self.journal_file, backup)
+            details = '; '.join(
+                f'offset {start}: {reason}'
+                for start, reason in self._journal_errors[:MAX_REPORTED_ERRORS]
+            )
+            Logger.warning(
+                f"Storage: Skipped {len(self._journal_errors)} malformed journal lines ({details}), "
+                f"original kept as {backup}"
+            )
+        if good_end < size:
+            Logger.warning(f"Storage: Dropping {size - good_end} bytes of torn journal tail")
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(good_end)
+
+
+class SqliteStore:
+    """SQLite 存储，接口与 JournalStore 相同
+
+    id 为主键，(timestamp, id) 上建索引，按 id 查找和按时间分页都是 O(log N)。
+    数据库在第一次使用时才打开（load() 在 I/O 线程中调用），首次打开时导入已有的
+    日志存储（items_data.json 快照 + items_data.journal），迁移不在主线程上执行。
+    """
+    def __init__(self, data_file, db_file=None):
+        self.data_file = data_file
+        self.db_file = db_file or os.path.splitext(data_file)[0] + '.db'
+        self._conn = None
+        self.skipped_entries = 0
+        # 迁移时日志存储的快照结构无法识别，原文件移到的路径（否则为 None）
+        self.snapshot_corrupt = None
+        # 迁移时发现的损坏（跳过的条目数，移走的快照），由迁移后第一次加载报告
+        self._import_damage = (0, None)
+
+    @property
+    def _db(self):
+        """数据库连接，第一次访问时打开并建表 / 迁移"""
+        if self._conn is None:
+            # 只有选用 SQLite 后端时才导入，默认的日志存储不在启动路径上加载 sqlite3
+            import sqlite3
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn = conn
+            self._create_schema()
+        return self._conn
+
+    def _create_schema(self):
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS items ('
+                ' id TEXT PRIMARY KEY,'
+                ' timestamp TEXT NOT NULL,'
+                ' data TEXT NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_items_timestamp ON items (timestamp, id)'
+            )
+        version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+        if version == 0:
+            self.import_journal(self.data_file)
+            self._conn.execute('PRAGMA user_version = 1')
+
+    def import_journal(self, data_file):
+        """导入日志存储中的全部记录（快照与尚未压缩的日志合并后的结果，已存在的 id 会被覆盖）"""
+        journal = JournalStore(data_file)
+        if not os.path.exists(journal.data_file) and not os.path.exists(journal.journal_file):
+            return 0
+        try:
+            items = journal.load()
+        finally:
+            journal.close()
+        self._import_damage = (journal.skipped_entries, journal.snapshot_corrupt)
+        with self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO items (id, timestamp, data) VALUES (?, ?, ?)',
+                [self._row(item) for item in items]
+            )
+        Logger.info(f"Storage: Imported {len(items)} items from {data_file}")
+        return len(items)
+
+    def load(self, preview_size=0, on_preview=None):
+        """读取全部记录；preview_size > 0 时先按索引取最新一页交给 on_preview"""
+        if on_preview and preview_size:
+            # 预览只是提前显示，失败时直接读取全部记录
+            try:
+                preview = self.page(preview_size)
+            except Exception as e:
+                Logger.warning(f"Storage: Preview failed, loading all items: {e}")
+            else:
+                on_preview(preview)
+        items, skipped = self._decode(self._db.execute('SELECT data FROM items'))
+        import_skipped, self.snapshot_corrupt = self._import_damage
+        self._import_damage = (0, None)
+        self.skipped_entries = skipped + import_skipped
+        Logger.info(f"Storage: Loaded {len(items)} items from {self.db_file}")
+        return items
+
+    def add(self, item):
+        with self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO items (id, timestamp, data) VALUES (?, ?, ?)',
+                self._row(item)
+            )
+
+    def delete(self, item_id):
+        with self._db:
+            self._db.execute('DELETE FROM items WHERE id = ?', (item_id,))
+
+    def delete_many(self, item_ids):
+        with self._db:
+            self._db.executemany(
+                'DELETE FROM items WHERE id = ?',
+                [(item_id,) for item_id in item_ids]
+            )
+
+    def write_batch(self, changes):
+        """在一个事务中写入多条变更（[(id, 记录)]，记录为 None 表示删除），返回写入的字节数"""
+        rows = [self._row(item) for _, item in changes if item is not None]
+        deleted = [(item_id,) for item_id, item in changes if item is None]
+        with self._db:
+            if rows:
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO items (id, timestamp, data) VALUES (?, ?, ?)',
+                    rows
+                )
+            if deleted:
+                self._db.executemany('DELETE FROM items WHERE id = ?', deleted)
+        return sum(len(row[2].encode('utf-8')) for row in rows)
+
+    def get(self, item_id):
+        """按 id 查找单条记录，不存在或已损坏时返回 None"""
+        row = self._db.execute('SELECT data FROM items WHERE id = ?', (item_id,)).fetchone()
+        items, _ = self._decode([row] if row else [])
+        return items[0] if items else None
+
+    def count(self):
+        return self._db.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+
+    def page(self, limit, before=None):
+        """按时间倒序分页，跳过损坏的行
+
+        before 为上一页最后一条记录的 (timestamp, id)，None 表示从最新开始；
+        行值比较让 SQLite 直接在 (timestamp, id) 索引上定位，翻到后面的页也不扫描前面的行。
+        """
+        if before is None:
+            rows = self._db.execute(
+                'SELECT data FROM items ORDER BY timestamp DESC, id DESC LIMIT ?',
+                (limit,)
+            )
+        else:
+            timestamp, item_id = before
+            rows = self._db.execute(
+                'SELECT data FROM items'
+                ' WHERE (timestamp, id) < (?, ?)'
+                ' ORDER BY timestamp DESC, id DESC LIMIT ?',
+                (timestamp, item_id, limit)
+            )
+        items, _ = self._decode(rows)
+        return items
+
+    def needs_compaction(self):
+        return False
+
+    def compact(self, items):
+        """用给定记录整体替换表内容，返回写入的字节数"""
+        rows = [self._row(item) for item in items]
+        with self._db:
+            self._db.execute('DELETE FROM items')
+            self._db.executemany(
+                'INSERT OR REPLACE INTO items (id, timestamp, data) VALUES (?, ?, ?)',
+                rows
+            )
+        return sum(len(row[2].encode('utf-8')) for row in rows)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _decode(self, rows):
+        """解析查询结果，返回 (记录列表, 跳过的损坏行数)"""
+        items = []
+        skipped = 0
+        for row in rows:
+            try:
+                items.append(record_from_dict(json.loads(row[0])))
+            except (TypeError, ValueError) as e:
+                skipped += 1
+                Logger.warning(f"Storage: Skipping malformed row: {e}")
+        return items, skipped
+
+    def _row(self, item):
+        data = as_dict(item)
+        return (
+            data.get('id'),
+            data.get('timestamp', ''),
+            json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        )
+
+
+def open_store(data_file, backend='journal'):
+    """按名称创建存储后端：'journal'（默认）或 'sqlite'"""
+    if backend == 'sqlite':
+        return SqliteStore(data_file)
+    if backend != 'journal':
+        Logger.warning(f"Storage: Unknown backend {backend}, using journal")
+    return JournalStore(data_file)
@@ -0,0 +1,190 @@
+"""图片文件与记录的对账（回收孤儿文件、标记图片缺失的记录）"""
+import os
+import time
+
+from kivy.logger import Logger
+
+# 相机 / 测试照片先写到数据目录下的 item_*.jpg，导入后移入内容存储
+CAPTURE_PREFIX = 'item_'
+CAPTURE_EXT = '.jpg'
+
+
+class StorageReconciler:
+    """一次扫描图片目录，与记录的图片路径求差集
+
+    扫描范围：数据目录下的拍照临时文件（item_*.jpg，数据目录同时是桌面上的代码目录，
+    其他文件一概不碰）、内容存储 images/ 的两级目录，以及缩略图缓存目录。
+    - 没有记录引用的文件为孤儿：内容存储中的文件经 ContentStore.remove_unreferenced
+      删除（引用计数仍为 0 才删），拍照临时文件直接删除，失效的缩略图直接删除；
+      grace_seconds 内修改过的文件可能正在导入，跳过。
+    - 记录引用但不存在的文件为缺失，返回给主线程，卡片据此显示占位，不再逐张 stat。
+    - 加载时跳过了损坏的记录，这些记录的照片看起来也是孤儿。此时调用 hold() 暂停回收
+      （写入 hold_file，重启后仍然有效），之后的对账只报告不删除；所有文件重新都有
+      记录引用（数据已恢复）或调用方经用户确认后调用 release() 时恢复回收。
+    run() / hold() / release() 在 I/O 线程中执行。
+    """
+    def __init__(self, data_dir, content_store, thumbnail_cache=None, grace_seconds=600,
+                 hold_file=None):
+        self.data_dir = os.path.abspath(data_dir)
+        self.content_store = content_store
+        self.thumbnail_cache = thumbnail_cache
+        self.grace_seconds = grace_seconds
+        self.hold_file = hold_file
+
+    @property
+    def held(self):
+        """回收是否已暂停"""
+        return self.hold_file is not None and os.path.exists(self.hold_file)
+
+    def hold(self, reason):
+        """暂停回收，原因写入 hold_file"""
+        if self.hold_file is None:
+            return
+        with open(self.hold_file, 'w', encoding='utf-8') as f:
+            f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {reason}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        Logger.warning(f"StorageGC: Reclaiming paused ({reason})")
+
+    def release(self):
+        """恢复回收"""
+        if self.held:
+            os.remove(self.hold_file)
+            Logger.info("StorageGC: Reclaiming resumed")
+
+    def scan(self):
+        """扫描拍照临时文件和内容存储，返回 {绝对路径: stat}"""
+        files = {}
+        with os.scandir(self.data_dir) as entries:
+            for entry in entries:
+                if (entry.name.startswith(CAPTURE_PREFIX) and entry.name.endswith(CAPTURE_EXT)
+                        and entry.is_file()):
+                    files[entry.path] = entry.stat()
+        images_root = os.path.abspath(self.content_store.root)
+        if os.path.isdir(images_root):
+            with os.scandir(images_root) as buckets:
+                for bucket in buckets:
+                    if not bucket.is_dir():
+                        continue
+                    with os.scandir(bucket.path) as entries:
+                        for entry in entries:
+                            if entry.is_file() and not entry.name.endswith('.tmp'):
+                                files[entry.path] = entry.stat()
+        return files
+
+    def run(self, items, reclaim=True, exclude=()):
+        """对账并（reclaim 且未暂停时）回收孤儿文件，返回报告
+
+        items 为记录快照；exclude 为不能回收的路径（如正在等待相机写入的照片）。
+        报告中 missing 为图片缺失记录的 image_path 集合（与记录中的写法相同），
+        held 表示回收仍处于暂停状态。
+        """
+        started = time.perf_counter()
+        held = self.held
+        files = self.scan()
+        images_root = os.path.abspath(self.content_store.root)
+
+        # 绝对路径 -> 记录中的写法
+        referenced = {}
+        for item in items:
+            image_path = item.get('image_path')
+            if image_path:
+                referenced[os.path.abspath(image_path)] = image_path
+
+        missing = set()
+        for path, image_path in referenced.items():
+            if path in files:
+                continue
+            # 扫描范围之外的旧路径单独检查
+            scanned = path.startswith(images_root + os.sep) or (
+                os.path.dirname(path) == self.data_dir
+                and os.path.basename(path).startswith(CAPTURE_PREFIX)
+                and path.endswith(CAPTURE_EXT)
+            )
+            if scanned or not os.path.exists(path):
+                missing.add(image_path)
+
+        excluded = {os.path.abspath(path) for path in exclude if path}
+        cutoff = time.time() - self.grace_seconds
+        unreferenced = [
+            (path, stat) for path, stat in files.items()
+            if path not in referenced and path not in excluded
+        ]
+        orphans = [(path, stat) for path, stat in unreferenced if stat.st_mtime < cutoff]
+        orphan_bytes = sum(stat.st_size for _, stat in orphans)
+        if held and not unreferenced:
+            # 每个文件都有记录引用，跳过的记录已恢复（或没有照片），不会再误删
+            self.release()
+            held = False
+
+        reclaimed = 0
+        reclaimed_bytes = 0
+        thumbnails_removed = 0
+        if reclaim and not held:
+            for path, stat in orphans:
+                try:
+                    if self._remove_orphan(path, images_root):
+                        reclaimed += 1
+                        reclaimed_bytes += stat.st_size
+                except OSError as e:
+                    Logger.warning(f"StorageGC: Failed to remove {path}: {e}")
+            thumbnails_removed = self._remove_stale_thumbnails(referenced, files, cutoff)
+
+        report = {
+            'files': len(files),
+            'referenced': len(referenced),
+            'orphans': len(orphans),
+            'orphan_bytes': orphan_bytes,
+            'reclaimed': reclaimed,
+            'reclaimed_bytes': reclaimed_bytes,
+            'thumbnails_removed': thumbnails_removed,
+            'missing': missing,
+            'held': held,
+            'elapsed_ms': (time.perf_counter() - started) * 1000.0
+        }
+        Logger.info(
+            f"StorageGC: {report['files']} files, {report['orphans']} orphans "
+            f"({orphan_bytes / 1048576.0:.1f} MB, {reclaimed} reclaimed{', paused' if held else ''}), "
+            f"{thumbnails_removed} stale thumbnails removed, {len(missing)} missing images "
+            f"in {report['elapsed_ms']:.0f} ms"
+        )
+        return report
+
+    def _remove_orphan(self, path, images_root):
+        if path.startswith(images_root + os.sep):
+            digest = os.path.splitext(os.path.basename(path))[0]
+            before_remove = self.thumbnail_cache.discard if self.thumbnail_cache else None
+            # 引用计数在锁内再确认一次，期间新导入的同内容照片不会被误删
+            return self.content_store.remove_unreferenced(digest, path, before_remove=before_remove)
+        if self.thumbnail_cache:
+            self.thumbnail_cache.discard(path)
+        os.remove(path)
+        return True
+
+    def _remove_stale_thumbnails(self, referenced, files, cutoff):
+        """删除不对应任何现存记录图片的缩略图（源文件已删除或已变化）"""
+        if self.thumbnail_cache is None or not os.path.isdir(self.thumbnail_cache.cache_dir):
+            return 0
+        expected = set()
+        for path in referenced:
+            stat = files.get(path)
+            if stat is None:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+            expected.add(os.path.basename(self.thumbnail_cache.cache_path(path, stat)))
+
+        removed = 0
+        with os.scandir(self.thumbnail_cache.cache_dir) as entries:
+            for entry in entries:
+                if entry.name in expected or not entry.is_file():
+                    continue
+                try:
+                    if entry.stat().st_mtime >= cutoff:
+                        continue
+                    os.remove(entry.path)
+                    removed += 1
+                except OSError as e:
+                    Logger.warning(f"StorageGC: Failed to remove thumbnail {entry.name}: {e}")
+        return removed
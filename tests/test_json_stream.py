@@ -0,0 +1,63 @@
+"""json_stream.ArrayStream 对损坏输入的处理
+
+用法:
+    python -m unittest discover -s tests
+"""
+import io
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import ArrayStream
+
+# 解析应当立即结束，超过这个时间视为死循环
+TIMEOUT = 5.0
+
+
+def read_all(text, key=None, chunk_size=64 * 1024):
+    """在线程中读完整个数组，返回 (元素列表, errors)；超时说明没有前进"""
+    result = []
+
+    def run():
+        stream = ArrayStream(io.StringIO(text), key=key, chunk_size=chunk_size)
+        result.append((list(stream), stream.errors))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(TIMEOUT)
+    if thread.is_alive():
+        raise AssertionError(f'ArrayStream did not finish on {text!r}')
+    return result[0]
+
+
+class StrayCloserTest(unittest.TestCase):
+    """元素后面多余的 '}' 跳过并报告，后面的元素照常读取"""
+
+    def check(self, text, expected, key=None):
+        # 小读取块让边界查找跨越多个块
+        for chunk_size in (64 * 1024, 3):
+            values, errors = read_all(text, key=key, chunk_size=chunk_size)
+            self.assertEqual(values, expected)
+            self.assertEqual(len(errors), 1)
+
+    def test_stray_brace_after_object(self):
+        self.check('[{"id":"1"}}, {"id":"2"}]', [{'id': '1'}, {'id': '2'}])
+
+    def test_row_ending_in_stray_brace(self):
+        text = '{"format":1,"rows":[\n["1","a"]},\n["2","b"]\n]}'
+        self.check(text, [['1', 'a'], ['2', 'b']], key='rows')
+
+    def test_stray_brace_inside_element(self):
+        self.check('[1,}}2,3]', [1, 3])
+
+    def test_stray_brace_before_truncation(self):
+        values, errors = read_all('[1}')
+        self.assertEqual(values, [1])
+        self.assertEqual(len(errors), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
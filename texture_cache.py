@@ -0,0 +1,95 @@
+"""卡片图片的纹理缓存（按字节预算 LRU 淘汰）"""
+from collections import OrderedDict
+
+from kivy.core.image import Image as CoreImage
+from kivy.logger import Logger
+
+from perf import profiler
+
+
+def texture_bytes(texture):
+    """纹理占用的显存估算（RGBA 每像素 4 字节）"""
+    width, height = texture.size
+    return width * height * 4
+
+
+class TextureCache:
+    """所有卡片共享的纹理缓存，只在主线程中使用
+
+    以原图路径为键保存缩略图纹理，卡片复用或列表重建时直接取用，不再解码。
+    缓存总字节数超过 max_bytes 时淘汰最久未使用的纹理；
+    缓存外的纹理只由正在显示的卡片引用，卡片复用后即可回收，内存不随记录数增长。
+    """
+    def __init__(self, max_bytes=24 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """取缓存的纹理，未命中时返回 None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def load(self, key, image_path):
+        """从文件（缩略图）创建纹理并放入缓存；已缓存时直接返回"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry[0]
+        # nocache：不再放入 Kivy 自带的全局图片缓存，内存只由本缓存控制
+        with profiler.span('texture_decode'):
+            texture = CoreImage(image_path, nocache=True).texture
+        self.put(key, texture)
+        return texture
+
+    def put(self, key, texture):
+        self.discard(key)
+        size = texture_bytes(texture)
+        self._entries[key] = (texture, size)
+        self.bytes += size
+        # 至少保留刚放入的纹理
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        Logger.info(
+            f"TextureCache: {stats['entries']} textures, "
+            f"{stats['bytes'] / 1048576.0:.1f}/{stats['max_bytes'] / 1048576.0:.0f} MB, "
+            f"{stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%}), "
+            f"{stats['evictions']} evictions"
+        )
@@ -0,0 +1,110 @@
+"""缩略图生成与磁盘缓存"""
+import hashlib
+import os
+import queue
+import threading
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+from perf import profiler
+
+
+class ThumbnailCache:
+    """在后台线程中生成缩略图，按 路径 + mtime + 大小 缓存到磁盘
+
+    request() 立即返回，生成完成后在主线程回调 callback(source_path, thumb_path)。
+    thumb_path 为 None 表示生成失败。
+    """
+    def __init__(self, cache_dir, max_size=(320, 320), quality=80):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.quality = quality
+        self._queue = queue.Queue()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def cache_path(self, source_path, stat_result):
+        """缩略图缓存路径，源文件变化（mtime / 大小）后自然失效"""
+        key = f"{os.path.abspath(source_path)}|{stat_result.st_mtime_ns}|{stat_result.st_size}"
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{digest}.jpg')
+
+    def request(self, source_path, callback):
+        """异步获取缩略图"""
+        with self._lock:
+            callbacks = self._pending.get(source_path)
+            if callbacks is not None:
+                # 同一张图已在队列中，只追加回调
+                callbacks.append(callback)
+                return
+            self._pending[source_path] = [callback]
+
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._worker,
+                    name='ThumbnailWorker',
+                    daemon=True
+                )
+                self._thread.start()
+
+        self._queue.put(source_path)
+
+    def discard(self, source_path):
+        """删除某张原图对应的缩略图（需在删除原图之前调用）"""
+        try:
+            thumb_path = self.cache_path(source_path, os.stat(source_path))
+            if os.path.exists(thumb_path):
+                os.remove(thumb_path)
+        except OSError as e:
+            Logger.warning(f"Thumbnails: Failed to discard thumbnail for {source_path}: {e}")
+
+    def _worker(self):
+        """后台线程：逐个生成缩略图"""
+        while True:
+            source_path = self._queue.get()
+            try:
+                with profiler.span('thumbnail'):
+                    thumb_path = self._generate(source_path)
+            except FileNotFoundError:
+                thumb_path = None
+            except Exception as e:
+                Logger.error(f"Thumbnails: Failed to create thumbnail for {source_path}: {e}")
+                thumb_path = None
+            Clock.schedule_once(lambda dt, s=source_path, t=thumb_path: self._deliver(s, t))
+
+    def _deliver(self, source_path, thumb_path):
+        """主线程：分发回调"""
+        with self._lock:
+            callbacks = self._pending.pop(source_path, [])
+        for callback in callbacks:
+            try:
+                callback(source_path, thumb_path)
+            except Exception as e:
+                Logger.error(f"Thumbnails: Callback failed: {e}")
+
+    def _generate(self, source_path):
+        """生成缩略图，已有缓存时直接返回"""
+        thumb_path = self.cache_path(source_path, os.stat(source_path))
+        if os.path.exists(thumb_path):
+            return thumb_path
+
+        try:
+            from PIL import Image as PILImage
+        except ImportError:
+            # 没有 PIL 时退回原图
+            return source_path
+
+        tmp_path = thumb_path + '.tmp'
+        with PILImage.open(source_path) as img:
+            # JPEG 可在解码阶段直接降采样，避免解码整张大图
+            img.draft('RGB', self.max_size)
+            img = img.convert('RGB')
+            img.thumbnail(self.max_size)
+            img.save(tmp_path, 'JPEG', quality=self.quality)
+        os.replace(tmp_path, thumb_path)
+        return thumb_path
@@ -0,0 +1,124 @@
+"""延迟合并写入（write-behind）"""
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+from perf import profiler
+
+
+class WriteBehind:
+    """把短时间内的存储变更合并成一次写入
+
+    add / delete 只在内存中记录每个 id 的最终状态并启动 delay 秒的定时器，
+    定时器到期（或调用 flush）时把全部变更交给 I/O 线程一次写入（日志只追加、
+    fsync 一次；SQLite 一个事务）。同一 id 在窗口内的多次修改只写最后一次；
+    请求整体快照（save_snapshot）时，窗口内的单条变更已包含在快照中，不再单独写。
+    写入失败时下一次改写整体快照，内存中的记录不会丢失。
+    只在主线程中使用；在生命周期节点（切到后台、退出）调用 flush() 把变更交给 I/O 线程，
+    切到后台时调用方用 IOExecutor.wait 有上限地等待落盘，退出时 IOExecutor.shutdown 等待写入完成。
+    """
+    def __init__(self, store, io, get_items, delay=1.0, on_flushed=None):
+        self.store = store
+        self.io = io
+        self.get_items = get_items
+        self.on_flushed = on_flushed
+        # id -> 记录（None 表示删除），保持首次修改的顺序
+        self.pending = {}
+        self.snapshot_requested = False
+        self.mutations = 0
+        self.flushes = 0
+        self.records_written = 0
+        self.snapshots_written = 0
+        self.writes_avoided = 0
+        self.bytes_written = 0
+        self.failures = 0
+        self._trigger = Clock.create_trigger(self.flush, delay)
+
+    @property
+    def dirty(self):
+        return bool(self.pending) or self.snapshot_requested
+
+    def add(self, item):
+        """新增或修改一条记录"""
+        self._mark(item.get('id'), item)
+
+    def delete(self, item_id):
+        self._mark(item_id, None)
+
+    def delete_many(self, item_ids):
+        for item_id in item_ids:
+            self._mark(item_id, None)
+
+    def save_snapshot(self):
+        """请求把全部记录重写为快照（在 flush 时取当时的记录）"""
+        self.mutations += 1
+        if self.snapshot_requested:
+            self.writes_avoided += 1
+        self.snapshot_requested = True
+        self._trigger()
+
+    def _mark(self, item_id, item):
+        self.mutations += 1
+        if item_id in self.pending:
+            # 窗口内的上一次修改被覆盖，不再单独写
+            self.writes_avoided += 1
+        self.pending[item_id] = item
+        self._trigger()
+
+    def flush(self, *args):
+        """把已合并的变更交给 I/O 线程写入，没有变更时直接返回"""
+        self._trigger.cancel()
+        if not self.dirty:
+            return
+        self.flushes += 1
+        if self.snapshot_requested:
+            self.writes_avoided += len(self.pending)
+            self.pending = {}
+            self.snapshot_requested = False
+            self.snapshots_written += 1
+            self.io.submit(
+                profiler.wrap('save_snapshot', self.store.compact),
+                self.get_items(),
+                on_done=self._on_written,
+                on_error=self._on_failed
+            )
+            return
+        changes = list(self.pending.items())
+        self.pending = {}
+        self.records_written += len(changes)
+        self.io.submit(
+            profiler.wrap('save_batch', self.store.write_batch),
+            changes,
+            on_done=self._on_written,
+            on_error=self._on_failed
+        )
+
+    def _on_written(self, size):
+        self.bytes_written += size or 0
+        if self.on_flushed:
+            self.on_flushed()
+
+    def _on_failed(self, e):
+        # 不知道哪些变更已经落盘，下一次改写整体快照
+        self.failures += 1
+        Logger.error(f"WriteBehind: Write failed, rewriting the snapshot: {e}")
+        self.snapshot_requested = True
+        self._trigger()
+
+    def stats(self):
+        return {
+            'mutations': self.mutations,
+            'flushes': self.flushes,
+            'records_written': self.records_written,
+            'snapshots_written': self.snapshots_written,
+            'writes_avoided': self.writes_avoided,
+            'bytes_written': self.bytes_written,
+            'failures': self.failures
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        Logger.info(
+            f"WriteBehind: {stats['mutations']} changes in {stats['flushes']} flushes, "
+            f"{stats['records_written']} records + {stats['snapshots_written']} snapshots written, "
+            f"{stats['writes_avoided']} writes avoided, {stats['bytes_written'] / 1024.0:.1f} KB written"
+        )